@@ -18,7 +18,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=datas,
-    hiddenimports=['pillow_heif', 'PIL._tkinter_finder', 'PIL._webp', 'cairosvg', 'cairocffi', 'cssselect2', 'defusedxml', 'tinycss2', 'webencodings', 'moviepy', 'moviepy.editor', 'moviepy.video', 'moviepy.video.io', 'moviepy.video.fx', 'moviepy.video.fx.all', 'moviepy.audio', 'moviepy.audio.io', 'moviepy.audio.fx', 'moviepy.audio.fx.all', 'moviepy.config', 'moviepy.tools', 'proglog', 'decorator', 'imageio', 'imageio_ffmpeg', 'numpy', 'requests', 'tqdm', 'moviepy.video.tools', 'moviepy.audio.tools', 'moviepy.video.compositing', 'moviepy.audio.AudioClip', 'moviepy.video.VideoClip'],
+    hiddenimports=['core', 'engine', 'ffmpeg_backend', 'cache', 'output', 'journal', 'report', 'pages', 'svg', 'icons', 'transforms', 'profiles', 'scheduler', 'duplicates', 'thumbnails', 'ui_channel', 'queue_model', 'queue_view', 'scanner', 'pillow_heif', 'PIL._tkinter_finder', 'PIL._webp', 'PIL.ImageCms', 'cairosvg', 'cairosvg.parser', 'cairosvg.surface', 'cairocffi', 'cssselect2', 'defusedxml', 'tinycss2', 'webencodings', 'moviepy', 'moviepy.video', 'moviepy.video.io', 'moviepy.video.io.VideoFileClip', 'moviepy.audio.io.AudioFileClip', 'moviepy.video.fx', 'moviepy.video.fx.all', 'moviepy.audio', 'moviepy.audio.io', 'moviepy.audio.fx', 'moviepy.audio.fx.all', 'moviepy.config', 'moviepy.tools', 'proglog', 'decorator', 'imageio', 'imageio_ffmpeg', 'numpy', 'requests', 'tqdm', 'moviepy.video.tools', 'moviepy.audio.tools', 'moviepy.video.compositing', 'moviepy.audio.AudioClip', 'moviepy.video.VideoClip'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -0,0 +1,409 @@
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+# Performance guards. Run from the project root:
+#
+#   python benchmark.py startup              # import-time budget for GUI and CLI
+#   python benchmark.py images a.heic b.jpg -f icns   # time and peak RSS per image
+#   python benchmark.py corpus bench-corpus/  # deterministic synthetic inputs
+#   python benchmark.py suite --corpus bench-corpus/ -o run.json [--baseline old.json]
+#
+# Prints a JSON report and exits non-zero when a budget is blown, so it can gate CI.
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# --- Startup ---
+# module -> (budget in ms, modules that must NOT be loaded by importing it)
+HEAVY = {"moviepy", "numpy", "imageio", "imageio_ffmpeg", "cairosvg", "cairocffi", "pillow_heif"}
+STARTUP_TARGETS = {
+    "converter": (400, HEAVY),
+    "cli": (150, HEAVY | {"customtkinter", "tkinter"}),
+}
+
+
+def parse_importtime(stderr):
+    # Lines look like: "import time:   self [us] | cumulative | imported package"
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = int(cumulative)
+    return timings
+
+
+def measure_import(module, repeat):
+    best, loaded = None, set()
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=ROOT, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"importing {module} failed:\n{proc.stderr[-2000:]}")
+        timings = parse_importtime(proc.stderr)
+        us = timings.get(module, 0)
+        best = us if best is None else min(best, us)
+        loaded = {name.split(".")[0] for name in timings}
+    return best / 1000, loaded
+
+
+def run_startup(args):
+    report, ok = {}, True
+    for module, (budget, forbidden) in STARTUP_TARGETS.items():
+        ms, loaded = measure_import(module, args.repeat)
+        budget = args.budget_ms or budget
+        leaked = sorted(forbidden & loaded)
+        passed = ms <= budget and not leaked
+        ok = ok and passed
+        report[module] = {"import_ms": round(ms, 1), "budget_ms": budget, "heavy_modules": leaked, "pass": passed}
+    print(json.dumps({"startup": report}, indent=2))
+    return 0 if ok else 1
+
+
+# --- Per-Image Memory ---
+# Every file is converted in a fresh interpreter so its peak RSS is its own.
+
+def peak_rss_mb():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_measure(args):
+    sys.path.insert(0, ROOT)
+    from core import convert_file, load_heif
+    load_heif()
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    result = convert_file(args.path, args.mode, args.format, args.output)
+    elapsed = time.perf_counter() - started
+    print(json.dumps({
+        "path": args.path,
+        "status": result["status"],
+        "seconds": round(elapsed, 4),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "baseline_rss_mb": round(baseline, 1),
+    }))
+    return 0
+
+
+def measure_file(path, mode, fmt, out_dir):
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "_measure", path, mode, fmt, out_dir],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        return {"path": path, "status": "error", "error": proc.stderr.strip().splitlines()[-1:]}
+    return json.loads(proc.stdout)
+
+
+def run_images(args):
+    with tempfile.TemporaryDirectory() as out_dir:
+        results = [measure_file(os.path.abspath(path), "Image", args.format.lower(), out_dir) for path in args.paths]
+    print(json.dumps({"images": results}, indent=2))
+    return 0 if all(r["status"] != "error" for r in results) else 1
+
+
+# --- Synthetic Corpus ---
+# Same seed -> byte-identical inputs, so two suite runs only differ by the code
+# under test. A manifest records what was generated; an existing corpus with a
+# matching manifest is reused as is.
+
+CORPUS_VERSION = 1
+IMAGE_SIZES = ((640, 480), (1920, 1080), (4000, 3000))
+SVG_SHAPES = (10, 200, 2000)
+VIDEO_SIZES = ("640x360", "1280x720")
+
+
+def noise_image(rng, size):
+    from PIL import Image
+    return Image.frombytes("RGB", size, rng.randbytes(size[0] * size[1] * 3))
+
+
+def gradient_image(size):
+    from PIL import Image
+    red = Image.linear_gradient("L").resize(size)
+    green = Image.linear_gradient("L").rotate(90).resize(size)
+    blue = Image.radial_gradient("L").resize(size)
+    return Image.merge("RGB", (red, green, blue))
+
+
+def svg_document(rng, shapes, size=512):
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" viewBox="0 0 {size} {size}">']
+    for _ in range(shapes):
+        x, y, r = rng.randrange(size), rng.randrange(size), rng.randrange(4, 64)
+        color = f"#{rng.randrange(0x1000000):06x}"
+        if rng.random() < 0.5:
+            parts.append(f'<circle cx="{x}" cy="{y}" r="{r}" fill="{color}" fill-opacity="0.6"/>')
+        else:
+            parts.append(f'<path d="M{x} {y} q{r} {-r} {2 * r} 0 t{2 * r} 0" stroke="{color}" stroke-width="3" fill="none"/>')
+    parts.append("</svg>")
+    return "\n".join(parts)
+
+
+def lavfi(ffmpeg, source, out_path, *codec_args):
+    # bitexact + one thread keeps encoder output identical between runs
+    subprocess.run(
+        [ffmpeg, "-hide_banner", "-nostdin", "-y", "-v", "error", "-f", "lavfi", "-i", source,
+         "-threads", "1", *codec_args, "-fflags", "+bitexact", "-flags", "+bitexact", out_path],
+        check=True,
+    )
+
+
+def build_corpus(root, seed=0, count=2):
+    sys.path.insert(0, ROOT)
+    import ffmpeg_backend
+
+    manifest_path = os.path.join(root, "manifest.json")
+    settings = {"version": CORPUS_VERSION, "seed": seed, "count": count}
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest["settings"] == settings and all(os.path.exists(os.path.join(root, p)) for ps in manifest["files"].values() for p in ps):
+            return manifest
+    except (OSError, ValueError, KeyError):
+        pass
+
+    rng = random.Random(seed)
+    files = {"images": [], "svg": [], "video": [], "audio": []}
+    for kind in files: os.makedirs(os.path.join(root, kind), exist_ok=True)
+
+    def add(kind, name):
+        files[kind].append(f"{kind}/{name}")
+        return os.path.join(root, kind, name)
+
+    for w, h in IMAGE_SIZES:
+        for i in range(count):
+            noise_image(rng, (w, h)).save(add("images", f"noise_{w}x{h}_{i}.png"), compress_level=1)
+            gradient_image((w, h)).rotate(90 * i, expand=True).save(add("images", f"gradient_{w}x{h}_{i}.jpg"), quality=90)
+
+    for shapes in SVG_SHAPES:
+        for i in range(count):
+            with open(add("svg", f"shapes_{shapes}_{i}.svg"), "w") as f:
+                f.write(svg_document(rng, shapes))
+
+    ffmpeg = ffmpeg_backend.find_ffmpeg()
+    if ffmpeg:
+        for i, size in enumerate(VIDEO_SIZES):
+            out = add("video", f"testsrc_{size}.mp4")
+            lavfi(ffmpeg, f"testsrc2=size={size}:rate=25:duration=5", out + ".tmp.mp4", "-c:v", "libx264", "-pix_fmt", "yuv420p")
+            # Add a tone so audio copy/encode paths are exercised too
+            subprocess.run([ffmpeg, "-hide_banner", "-nostdin", "-y", "-v", "error", "-i", out + ".tmp.mp4",
+                            "-f", "lavfi", "-i", f"sine=frequency={440 + 110 * i}:duration=5", "-shortest",
+                            "-c:v", "copy", "-c:a", "aac", "-threads", "1", "-fflags", "+bitexact", "-flags", "+bitexact", out], check=True)
+            os.unlink(out + ".tmp.mp4")
+        for i in range(count):
+            lavfi(ffmpeg, f"sine=frequency={220 * (i + 1)}:duration=30", add("audio", f"tone_{i}.wav"))
+            lavfi(ffmpeg, f"sine=frequency={330 * (i + 1)}:duration=30", add("audio", f"tone_{i}.mp3"), "-c:a", "libmp3lame", "-b:a", "192k")
+
+    manifest = {"settings": settings, "files": files}
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def run_corpus(args):
+    manifest = build_corpus(os.path.abspath(args.root), args.seed, args.count)
+    print(json.dumps({"corpus": {kind: len(paths) for kind, paths in manifest["files"].items()}}, indent=2))
+    return 0
+
+
+# --- Throughput Suite ---
+# Each scenario is one GUI/CLI conversion path, run headless through the engine
+# with the cache off, in a fresh interpreter so peak RSS belongs to it alone.
+
+# name -> (corpus kind, mode, target format)
+SCENARIOS = {
+    "image-jpg":  ("images", "Image", "jpg"),
+    "image-png":  ("images", "Image", "png"),
+    "image-webp": ("images", "Image", "webp"),
+    "image-icns": ("images", "Image", "icns"),
+    "image-svg":  ("images", "Image", "svg"),
+    "image-web":  ("images", "Image", ("png", "webp", "jpg")),  # one decode, three encodes
+    "svg-png":    ("svg", "Image", "png"),
+    "video-mov":  ("video", "Video", "mov"),   # remux: h264/aac copy
+    "video-webm": ("video", "Video", "webm"),
+    "video-gif":  ("video", "Video", "gif"),
+    "video-awebp": ("video", "Video", "webp"),                 # animated WebP
+    "video-mp3":  ("video", "Audio", "mp3"),
+    "video-web":  ("video", "Video", ("mp4", "webm")),           # one ffmpeg run, two outputs
+    "audio-mp3":  ("audio", "Audio", "mp3"),
+    "audio-flac": ("audio", "Audio", "flac"),
+}
+
+
+def percentile(values, q):
+    # Nearest rank; fine for the handful-to-thousands of samples a run has
+    if not values: return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def run_scenario(args):
+    sys.path.insert(0, ROOT)
+    from core import convert_file, is_image_job, load_cairosvg
+    from engine import ConversionEngine
+    from report import STAGES
+
+    kind, mode, fmt = SCENARIOS[args.name]
+    with open(os.path.join(args.corpus, "manifest.json")) as f:
+        paths = [os.path.join(args.corpus, p) for p in json.load(f)["files"][kind]]
+    if not paths:
+        print(json.dumps({"skipped": "no inputs of this kind in the corpus"}))
+        return 0
+    if kind == "svg" and load_cairosvg() is None:
+        print(json.dumps({"skipped": "cairosvg / Cairo not available"}))
+        return 0
+
+    options = {"profile": args.profile}
+    latencies, errors = [], []
+    stages = dict.fromkeys(STAGES, 0.0)
+    with tempfile.TemporaryDirectory() as out_dir:
+        jobs = [(path, mode, fmt, out_dir, options) for path in paths]
+        started = time.perf_counter()
+        with ConversionEngine(workers=args.workers) as engine:
+            for job, result, error in engine.run(convert_file, jobs, is_image=is_image_job):
+                if error is not None:
+                    errors.append(f"{os.path.basename(job[0])}: {error}")
+                elif result["status"] == "success":
+                    latencies.append(result["seconds"])
+                    for stage, seconds in result["stages"].items(): stages[stage] += seconds
+        elapsed = time.perf_counter() - started
+
+    import resource
+    child = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    child = child / (1024 * 1024) if sys.platform == "darwin" else child / 1024
+    size_mb = sum(os.path.getsize(path) for path in paths) / 2 ** 20
+    print(json.dumps({
+        "files": len(paths),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "files_per_s": round(len(latencies) / elapsed, 3),
+        "mb_per_s": round(size_mb / elapsed, 3),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1) if latencies else None,
+        "stage_seconds": {stage: round(seconds, 3) for stage, seconds in stages.items()},
+        # Image worker processes and ffmpeg run outside this process; largest of them
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "peak_child_rss_mb": round(child, 1),
+    }))
+    return 0
+
+
+def compare(report, baseline):
+    # Ratio > 1 means this run is faster than the baseline
+    changes = {}
+    for name, now in report.items():
+        before = baseline.get(name)
+        if not before or not now.get("files_per_s") or not before.get("files_per_s"): continue
+        changes[name] = {
+            "speedup": round(now["files_per_s"] / before["files_per_s"], 3),
+            "peak_rss_ratio": round(now["peak_rss_mb"] / before["peak_rss_mb"], 3) if before.get("peak_rss_mb") else None,
+        }
+    return changes
+
+
+def run_suite(args):
+    corpus = os.path.abspath(args.corpus)
+    manifest = build_corpus(corpus, args.seed, args.count)
+    names = args.scenarios or list(SCENARIOS)
+    unknown = sorted(set(names) - set(SCENARIOS))
+    if unknown: raise SystemExit(f"unknown scenario(s): {', '.join(unknown)} (choose from: {', '.join(SCENARIOS)})")
+
+    results = {}
+    for name in names:
+        cmd = [sys.executable, os.path.abspath(__file__), "_scenario", name, corpus, "--profile", args.profile]
+        if args.workers: cmd += ["--workers", str(args.workers)]
+        proc = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+        if proc.returncode != 0:
+            results[name] = {"error": proc.stderr.strip().splitlines()[-1:]}
+        else:
+            results[name] = json.loads(proc.stdout)
+        print(f"{name}: {json.dumps(results[name])}", file=sys.stderr)
+
+    report = {
+        "suite": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "corpus": manifest["settings"],
+            "profile": args.profile,
+            "workers": args.workers,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "scenarios": results,
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["vs_baseline"] = compare(results, json.load(f)["scenarios"])
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+    failed = any("error" in r or r.get("errors") for r in results.values())
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mac Converter Pro performance benchmarks.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    startup = sub.add_parser("startup", help="measure import time of the GUI and CLI entry points")
+    startup.add_argument("--repeat", type=int, default=5, help="runs per module; the fastest is reported")
+    startup.add_argument("--budget-ms", type=float, default=None, help="override the per-module budget")
+    startup.set_defaults(func=run_startup)
+
+    images = sub.add_parser("images", help="convert each image in its own process and report time and peak RSS")
+    images.add_argument("paths", nargs="+")
+    images.add_argument("-f", "--format", default="icns", help="target format (default: icns)")
+    images.set_defaults(func=run_images)
+
+    corpus = sub.add_parser("corpus", help="generate the deterministic synthetic corpus")
+    corpus.add_argument("root")
+    corpus.add_argument("--seed", type=int, default=0)
+    corpus.add_argument("--count", type=int, default=2, help="files per kind and size (default: 2)")
+    corpus.set_defaults(func=run_corpus)
+
+    suite = sub.add_parser("suite", help="run every conversion path over the corpus and report throughput")
+    suite.add_argument("--corpus", default=os.path.join(ROOT, "bench-corpus"), help="corpus folder (generated if missing)")
+    suite.add_argument("--seed", type=int, default=0)
+    suite.add_argument("--count", type=int, default=2, help="files per kind and size (default: 2)")
+    suite.add_argument("--scenarios", nargs="+", metavar="NAME", help=f"subset to run (default: all of {', '.join(SCENARIOS)})")
+    suite.add_argument("-j", "--workers", type=int, default=None, help="parallel image workers (default: all cores)")
+    suite.add_argument("--profile", default="balanced", help="encoder profile (default: balanced)")
+    suite.add_argument("-o", "--output", default=None, help="also write the JSON report here")
+    suite.add_argument("--baseline", default=None, help="earlier report to compare against")
+    suite.set_defaults(func=run_suite)
+
+    scenario = sub.add_parser("_scenario")
+    scenario.add_argument("name")
+    scenario.add_argument("corpus")
+    scenario.add_argument("--workers", type=int, default=None)
+    scenario.add_argument("--profile", default="balanced")
+    scenario.set_defaults(func=run_scenario)
+
+    measure = sub.add_parser("_measure")
+    measure.add_argument("path")
+    measure.add_argument("mode")
+    measure.add_argument("format")
+    measure.add_argument("output")
+    measure.set_defaults(func=run_measure)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
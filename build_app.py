@@ -22,24 +22,50 @@ def build():
 
     # 3. Collect all hidden imports needed
     hidden_imports = [
+        # App modules. Several are only imported lazily or inside the spawned image
+        # worker processes (which unpickle core.convert_file), so list them all
+        'core',
+        'engine',
+        'ffmpeg_backend',
+        'cache',
+        'output',
+        'journal',
+        'report',
+        'pages',
+        'svg',
+        'icons',
+        'transforms',
+        'profiles',
+        'scheduler',
+        'duplicates',
+        'thumbnails',
+        'ui_channel',
+        'queue_model',
+        'queue_view',
+        'scanner',
+
         # Core dependencies
         'pillow_heif',
         'PIL._tkinter_finder',  # PIL tkinter support
         'PIL._webp',  # WebP support
+        'PIL.ImageCms',  # colour profile conversion (transforms.py, imported on use)
         
         # SVG support
         'cairosvg',
+        'cairosvg.parser',
+        'cairosvg.surface',
         'cairocffi',
         'cssselect2',
         'defusedxml',
         'tinycss2',
         'webencodings',
         
-        # MoviePy and all its submodules
+        # MoviePy (fallback when ffmpeg is missing): core imports the clip classes directly
         'moviepy',
-        'moviepy.editor',
         'moviepy.video',
         'moviepy.video.io',
+        'moviepy.video.io.VideoFileClip',
+        'moviepy.audio.io.AudioFileClip',
         'moviepy.video.fx',
         'moviepy.video.fx.all',
         'moviepy.audio',
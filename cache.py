@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+
+# --- Conversion Cache ---
+# Remembers the outputs of finished conversions, keyed on the source (path, size,
+# mtime, or optionally a content hash) plus the target format and settings.
+# Outputs are kept under <cache>/store/ and linked back into the output folder on
+# a hit, so re-running an unchanged batch is a handful of hard links.
+# Entries are stored by the part of each output name after the job's stem
+# (".png", "_p002.tiff"), so a hit lands under whatever name the job resolves to
+# in this run. A hit never replaces a file that is not already a link to the
+# entry: that job is converted like any other. Since stored files share their
+# inode with the outputs handed to the user, each one's content hash is kept and
+# checked on every hit, so an output edited in place is never served back.
+# The index is a small SQLite table used for lookups and LRU eviction.
+
+CACHE_VERSION = 2
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+HASH_CHUNK = 1024 * 1024
+
+
+def default_cache_dir():
+    if sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "MacConverterPro")
+
+
+def file_digest(path):
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_fingerprint(path, hash_content=False):
+    if hash_content:
+        # Same bytes -> same key, wherever the file lives or however it was touched
+        return "blake2b:" + file_digest(path)
+    st = os.stat(path)
+    return f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}"
+
+
+def link_or_copy(src, dst):
+    # Stage next to dst and rename over it, so dst is never half written
+    tmp = f"{dst}.linking-{os.getpid()}-{threading.get_ident()}"
+    try:
+        os.link(src, tmp)
+    except OSError:
+        # Different volume, or a filesystem without hard links
+        shutil.copy2(src, tmp)
+    os.replace(tmp, dst)
+
+
+class ConversionCache:
+    def __init__(self, root=None, max_bytes=DEFAULT_MAX_BYTES, hash_content=False):
+        self.root = root or default_cache_dir()
+        self.store_dir = os.path.join(self.root, "store")
+        self.max_bytes = max_bytes
+        self.hash_content = hash_content
+        os.makedirs(self.store_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(self.root, "index.sqlite3"), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, names TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_used)")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def key(self, filepath, settings):
+        payload = json.dumps([CACHE_VERSION, source_fingerprint(filepath, self.hash_content), settings], sort_keys=True)
+        return hashlib.blake2b(payload.encode(), digest_size=20).hexdigest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.store_dir, key[:2], key)
+
+    def restore(self, key, out_dir, stem):
+        # -> list of output paths now in out_dir (named after stem), or None on a miss
+        with self._lock:
+            row = self._db.execute("SELECT names FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None: return None
+
+        entry = self._entry_dir(key)
+        files = json.loads(row[0])  # [[suffix, digest], ...]
+        try:
+            if any(file_digest(os.path.join(entry, suffix)) != digest for suffix, digest in files):
+                raise FileNotFoundError(entry)
+        except OSError:
+            # Entry was edited through a linked output, or partly removed; forget it
+            self._drop(key)
+            return None
+
+        pairs = [(os.path.join(entry, suffix), os.path.join(out_dir, stem + suffix)) for suffix, _ in files]
+        # Output from an earlier run still in place: nothing to do for it. Any other
+        # file under the target name is not ours to replace: convert instead.
+        in_place = [os.path.exists(dst) and os.path.samefile(src, dst) for src, dst in pairs]
+        if any(os.path.lexists(dst) and not same for (_, dst), same in zip(pairs, in_place)): return None
+        outputs = []
+        for (src, dst), same in zip(pairs, in_place):
+            if not same: link_or_copy(src, dst)
+            outputs.append(dst)
+
+        with self._lock:
+            self._db.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+        return outputs
+
+    def store(self, key, outputs, stem):
+        # outputs must all be named stem + suffix (see restore)
+        names = [os.path.basename(path) for path in outputs]
+        if not all(name.startswith(stem) for name in names): return
+        entry = self._entry_dir(key)
+        staging = f"{entry}.staging-{os.getpid()}-{threading.get_ident()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        try:
+            files, size = [], 0
+            for path, name in zip(outputs, names):
+                suffix = name[len(stem):]
+                link_or_copy(path, os.path.join(staging, suffix))
+                files.append([suffix, file_digest(os.path.join(staging, suffix))])
+                size += os.path.getsize(path)
+            if size > self.max_bytes: return
+            shutil.rmtree(entry, ignore_errors=True)
+            os.replace(staging, entry)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, names, size, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(files), size, time.time()),
+            )
+        self._evict()
+
+    def _drop(self, key):
+        shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+        with self._lock:
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def _evict(self):
+        with self._lock:
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes: return
+            victims = []
+            for key, size in self._db.execute("SELECT key, size FROM entries ORDER BY last_used"):
+                if total <= self.max_bytes: break
+                victims.append(key)
+                total -= size
+            self._db.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in victims])
+        for key in victims:
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+
+    def total_bytes(self):
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM entries")
+        shutil.rmtree(self.store_dir, ignore_errors=True)
+        os.makedirs(self.store_dir, exist_ok=True)
@@ -0,0 +1,285 @@
+import argparse
+import fnmatch
+import glob
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+
+from PIL import ImageColor
+
+from cache import DEFAULT_MAX_BYTES, ConversionCache, default_cache_dir
+from core import FORMAT_CATEGORIES, PAGE_MODES, SUPPORTED_EXTENSIONS, convert_file, merge_batch, resume_jobs, run_batch
+from duplicates import resolve_names
+from engine import DEFAULT_MEDIA_WORKERS, ConversionEngine, default_workers
+from ffmpeg_backend import DEFAULT_ANIM_FPS, DEFAULT_ANIM_WIDTH
+from journal import BatchJournal, find as find_journal
+from pages import MULTIPAGE_FORMATS
+from profiles import DEFAULT_PROFILE, PROFILES
+from report import RunReport, trace_file
+from scanner import scan_tree
+from transforms import COLORSPACES, FIT_MODES, parse_size
+
+# Headless entry point. Shares convert_file() and the engine with the GUI but
+# never imports customtkinter, so it is usable on build servers and in cron:
+#
+#   python -m cli "~/Photos/**/*.heic" --mode image --format png -o out/ -j 8
+#
+# Progress is streamed to stdout as one JSON object per line.
+
+MODES = {name.lower(): name for name in FORMAT_CATEGORIES}
+
+
+def expand_inputs(patterns):
+    seen = set()
+    files = []
+
+    def add(path):
+        path = os.path.abspath(path)
+        if path not in seen:
+            seen.add(path)
+            files.append(path)
+
+    for pattern in patterns:
+        pattern = os.path.expanduser(pattern)
+        matches = sorted(glob.glob(pattern, recursive=True)) or ([pattern] if os.path.exists(pattern) else [])
+        for match in matches:
+            if os.path.isdir(match):
+                for path in scan_tree(match, SUPPORTED_EXTENSIONS):
+                    add(path)
+            else:
+                add(match)
+    return files
+
+
+def emit(event, **fields):
+    sys.stdout.write(json.dumps({"event": event, **fields}) + "\n")
+    sys.stdout.flush()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="mac-converter", description="Batch convert images, audio and video without the GUI.")
+    parser.add_argument("inputs", nargs="*", help="files, folders or glob patterns (quote them; ** is supported)")
+    parser.add_argument("-m", "--mode", choices=sorted(MODES), help="conversion mode")
+    parser.add_argument("-f", "--format", help="output format, e.g. png, mp3, mp4; several comma-separated (png,webp,jpg) decode each input once and write them all")
+    parser.add_argument("-o", "--output", help="output directory (created if missing)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help=f"parallel image workers (default: {default_workers()})")
+    parser.add_argument("--media-jobs", type=int, default=None, help=f"concurrent ffmpeg/moviepy conversions, independent of --jobs (default: {DEFAULT_MEDIA_WORKERS})")
+    parser.add_argument("--first", action="append", default=[], metavar="PATTERN", help="start inputs whose path or name matches PATTERN (e.g. '*.mov') before all others; repeatable")
+    parser.add_argument("--svg-dpi", type=float, default=None, help="resolution used when rasterizing SVG input (default: 96)")
+    parser.add_argument("--svg-width", type=int, default=None, help="rasterize SVG input to this pixel width")
+    parser.add_argument("--svg-height", type=int, default=None, help="rasterize SVG input to this pixel height")
+    parser.add_argument("--max-size", metavar="WxH", default=None, help="images: resize to fit a box, e.g. 1920 or 1200x630 (see --fit)")
+    parser.add_argument("--fit", choices=FIT_MODES, default=None, help="with --max-size: shrink to fit (never enlarge; default), fill and crop to exactly WxH, or pad to exactly WxH")
+    parser.add_argument("--auto-rotate", action="store_true", help="images: apply the EXIF orientation to the pixels")
+    parser.add_argument("--colorspace", choices=COLORSPACES, default=None, help="images: convert to sRGB (using any embedded ICC profile) or grayscale")
+    parser.add_argument("--flatten", action="store_true", help="images: composite transparency onto --background")
+    parser.add_argument("--background", metavar="COLOR", default=None, help="colour for --flatten and --fit pad, e.g. white, '#202020' (default: white)")
+    parser.add_argument("--anim-fps", type=float, default=None, help=f"GIF / animated WebP frame rate; 0 keeps the source rate (default: {DEFAULT_ANIM_FPS})")
+    parser.add_argument("--anim-width", type=int, default=None, help=f"GIF / animated WebP maximum width in pixels, never upscaled; 0 keeps the source size (default: {DEFAULT_ANIM_WIDTH})")
+    parser.add_argument("-p", "--profile", choices=PROFILES, default=DEFAULT_PROFILE, help=f"encoder speed/quality profile (default: {DEFAULT_PROFILE})")
+    parser.add_argument("--pages", choices=PAGE_MODES, default="first", help="multi-page sources: convert the first page, one numbered file per page, or keep all pages (PDF/TIFF)")
+    parser.add_argument("--merge", metavar="NAME", default=None, help="append every page of every input, in order, to one PDF/TIFF file NAME in the output directory")
+    parser.add_argument("--resume", nargs="?", const="latest", metavar="BATCH", help="finish an interrupted batch (the newest one, or the given batch id) instead of starting a new one")
+    parser.add_argument("--report", metavar="PATH", default=None, help="write a per-file run report (stage timings, bytes, backend, errors); .csv or .json")
+    parser.add_argument("--trace", metavar="FILE", default=None, help="convert just FILE in-process under cProfile and tracemalloc and print where the time and memory went")
+    parser.add_argument("--trace-dump", metavar="PATH", default=None, help="with --trace: also save the raw cProfile stats (for snakeviz / pstats)")
+    parser.add_argument("--watch", action="store_true", help="keep running and convert every file that lands in the input folder (including files already there that were never converted)")
+    parser.add_argument("--settle", type=float, default=None, help="with --watch: seconds a file's size must hold still before it is converted (default: 2)")
+    parser.add_argument("--poll", type=float, default=None, metavar="SECONDS", help="with --watch: poll the folder every SECONDS instead of using inotify (e.g. for network shares)")
+    parser.add_argument("--no-dedupe", action="store_true", help="convert byte-identical inputs separately instead of linking one result to all of their names")
+    parser.add_argument("--sync", action="store_true", help="fsync outputs (in batches) before they count as done, e.g. before unplugging a drive")
+    parser.add_argument("--no-cache", action="store_true", help="always convert, never reuse earlier results")
+    parser.add_argument("--cache-dir", default=None, help="conversion cache location (also holds the batch journals and the --watch state)")
+    parser.add_argument("--cache-size", type=int, default=None, help=f"cache size limit in MB; least recently used entries are evicted (default: {DEFAULT_MAX_BYTES // 2 ** 20})")
+    parser.add_argument("--hash", action="store_true", help="key the cache on file contents instead of path/size/mtime")
+    return parser
+
+
+def build_settings(parser, args):
+    # -> (mode, fmt, out_dir, options): everything about a job except its input
+    if not (args.inputs and args.mode and args.format and args.output):
+        parser.error("inputs, --mode, --format and --output are required (unless using --resume)")
+    mode = MODES[args.mode]
+    formats = list(dict.fromkeys(f.strip().lower().lstrip(".") for f in args.format.split(",") if f.strip()))
+    if not formats:
+        parser.error("--format is empty")
+    for fmt in formats:
+        if fmt.upper() not in FORMAT_CATEGORIES[mode]:
+            parser.error(f"format '{fmt}' is not available in {args.mode} mode (choose from: {', '.join(FORMAT_CATEGORIES[mode]).lower()})")
+    if args.merge and (len(formats) > 1 or formats[0] not in MULTIPAGE_FORMATS):
+        parser.error(f"--merge needs a single multi-page format ({', '.join(MULTIPAGE_FORMATS)})")
+    fmt = formats[0] if len(formats) == 1 else tuple(formats)
+    if (args.anim_fps or 0) < 0 or (args.anim_width or 0) < 0:
+        parser.error("--anim-fps and --anim-width cannot be negative")
+    try:
+        max_size = parse_size(args.max_size) if args.max_size else None
+    except ValueError:
+        parser.error(f"--max-size must look like 1920 or 1200x630, not '{args.max_size}'")
+    if args.background:
+        try:
+            ImageColor.getrgb(args.background)
+        except ValueError:
+            parser.error(f"unknown --background colour '{args.background}'")
+
+    out_dir = os.path.abspath(os.path.expanduser(args.output))
+    os.makedirs(out_dir, exist_ok=True)
+
+    options = {key: value for key, value in (
+        ("profile", args.profile),
+        ("svg_dpi", args.svg_dpi), ("svg_width", args.svg_width), ("svg_height", args.svg_height),
+        ("pages", None if args.pages == "first" else args.pages),
+        ("anim_fps", args.anim_fps), ("anim_width", args.anim_width),
+        ("max_size", max_size), ("fit", args.fit), ("auto_rotate", args.auto_rotate or None),
+        ("colorspace", args.colorspace), ("flatten", args.flatten or None), ("background", args.background),
+    ) if value is not None}
+    return mode, fmt, out_dir, options
+
+
+def build_jobs(parser, args):
+    settings = build_settings(parser, args)
+    # Numbered names for inputs that would overwrite each other's outputs, fixed
+    # before the batch is journaled so a resumed run writes the same names
+    return resolve_names((filepath, *settings) for filepath in expand_inputs(args.inputs))
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.media_jobs is not None and args.media_jobs < 1:
+        parser.error("--media-jobs must be at least 1")
+
+    cache_dir = args.cache_dir and os.path.expanduser(args.cache_dir)
+    journal_dir = os.path.join(cache_dir or default_cache_dir(), "journals")
+
+    if args.trace:
+        args.inputs = [args.trace]
+        return run_trace(args, build_jobs(parser, args))
+
+    if args.watch:
+        if args.resume or args.merge:
+            parser.error("--watch cannot be combined with --resume or --merge")
+        # Files are converted one by one as they arrive: no cache, no batch-wide
+        # dedupe or ordering, and nothing to fsync as a batch
+        batch_only = {"--first": args.first, "--no-dedupe": args.no_dedupe, "--sync": args.sync, "--no-cache": args.no_cache,
+                      "--cache-size": args.cache_size is not None, "--hash": args.hash}
+        if any(batch_only.values()):
+            parser.error(f"--watch cannot be combined with {', '.join(flag for flag, given in batch_only.items() if given)}")
+        if len(args.inputs) != 1 or not os.path.isdir(os.path.expanduser(args.inputs[0])):
+            parser.error("--watch takes exactly one input folder")
+        return run_watch(args, build_settings(parser, args), os.path.join(cache_dir or default_cache_dir(), "watch"))
+
+    if args.resume:
+        if args.inputs or args.merge:
+            parser.error("--resume takes its inputs and settings from the interrupted batch")
+        journal = find_journal(None if args.resume == "latest" else args.resume, journal_dir)
+        if journal is None:
+            emit("error", message="no interrupted batch to resume")
+            return 2
+        jobs = resume_jobs(journal)
+        total = len(journal.jobs)
+    else:
+        jobs = build_jobs(parser, args)
+        if not jobs:
+            emit("error", message="no input files matched")
+            return 2
+        # A merge writes one file atomically; there is nothing to resume part way
+        journal = None if args.merge else BatchJournal.create(jobs, journal_dir)
+        total = len(jobs)
+
+    report = RunReport()
+    first = (journal.jobs if journal else jobs)[0]
+    emit("start", total=total, pending=len(jobs), batch=journal and journal.batch_id,
+         mode=first[1].lower(), format=first[2], profile=first[4].get("profile"), output=first[3])
+
+    cache = None
+    if not args.no_cache and not args.merge:
+        max_bytes = DEFAULT_MAX_BYTES if args.cache_size is None else args.cache_size * 2 ** 20
+        cache = ConversionCache(cache_dir, max_bytes=max_bytes, hash_content=args.hash)
+
+    try:
+        with ConversionEngine(workers=args.jobs, media_workers=args.media_jobs) as engine:
+            report_progress = lambda job, fraction: emit("progress", path=job[0], fraction=round(fraction, 3))
+            if args.merge:
+                results = merge_batch(jobs, os.path.join(first[3], os.path.expanduser(args.merge)))
+            else:
+                results = run_batch(engine, jobs, cache=cache, on_progress=report_progress, journal=journal,
+                                    pinned=pinned_paths(jobs, args.first), dedupe=not args.no_dedupe,
+                                    sync=args.sync)
+            for done, (job, result, error) in enumerate(results, total - len(jobs) + 1):
+                record = report.add(job, result, error)
+                emit("file", **{key: value for key, value in record.items() if value is not None and key not in ("mode", "format")},
+                     done=done, total=total)
+        if journal is not None: journal.finish()
+    finally:
+        # Interrupted (Ctrl-C, crash): the journal stays behind for --resume
+        if journal is not None: journal.close()
+        if cache is not None: cache.close()
+
+    if args.report: report.save(os.path.expanduser(args.report))
+    return emit_finish(report)
+
+
+def emit_finish(report):
+    # The closing event of a batch or watch session -> exit code
+    summary = report.summary()
+    counts = {status: summary["counts"].get(status, 0) for status in ("success", "cached", "skipped", "error")}
+    emit("finish", elapsed=summary["elapsed"], **counts, bytes_in=summary["bytes_in"], bytes_out=summary["bytes_out"],
+         stage_seconds=summary["stage_seconds"], backends=summary["backends"])
+    return 1 if counts["error"] else 0
+
+
+def pinned_paths(jobs, patterns):
+    return {job[0] for job in jobs
+            if any(fnmatch.fnmatch(job[0], p) or fnmatch.fnmatch(os.path.basename(job[0]), p) for p in patterns)}
+
+
+def run_watch(args, settings, state_dir):
+    # Imported here: inotify goes through ctypes, which batch runs never need
+    from watcher import FolderWatcher
+
+    # Ctrl-C / SIGTERM: stop taking new files and let the running ones finish;
+    # a second Ctrl-C gives up on those too. Unconverted files stay queued.
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        if stop.is_set() and signum == signal.SIGINT: raise KeyboardInterrupt
+        stop.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    report = RunReport()
+
+    def on_result(job, result, error):
+        record = report.add(job, result, error)
+        emit("file", **{key: value for key, value in record.items() if value is not None and key not in ("mode", "format")})
+
+    report_progress = lambda job, fraction: emit("progress", path=job[0], fraction=round(fraction, 3))
+    root = os.path.abspath(os.path.expanduser(args.inputs[0]))
+    with ConversionEngine(workers=args.jobs, media_workers=args.media_jobs) as engine:
+        watcher = FolderWatcher(root, settings, engine, state_dir, settle=args.settle, poll_interval=args.poll)
+        emit("watch", path=root, source=watcher.source.name, queued=watcher.queue.count("queued"),
+             mode=settings[0].lower(), format=settings[1], output=settings[2])
+        watcher.run(stop, on_result, report_progress)
+    if args.report: report.save(os.path.expanduser(args.report))
+    return emit_finish(report)
+
+
+def run_trace(args, jobs):
+    if len(jobs) != 1:
+        emit("error", message="--trace takes exactly one existing file")
+        return 2
+    trace = trace_file(convert_file, jobs[0], dump_path=args.trace_dump and os.path.expanduser(args.trace_dump))
+    sys.stderr.write(trace.pop("profile"))
+    emit("trace", path=jobs[0][0], **trace)
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
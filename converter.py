@@ -1,33 +1,42 @@
 import customtkinter as ctk
 from tkinter import filedialog, messagebox
-import os
 from pathlib import Path
-from PIL import Image
 import threading
-import pillow_heif
-import base64
-import io
-
-# Audio/Video processing
-from moviepy.editor import VideoFileClip, AudioFileClip
-
-# SVG processing
-try:
-    import cairosvg
-    SVG_SUPPORT = True
-except (ImportError, OSError):
-    # OSError occurs when cairo library is not installed on system
-    SVG_SUPPORT = False
-
-# Register HEIF opener for Apple formats
-pillow_heif.register_heif_opener()
-
-# Set Theme
-ctk.set_appearance_mode("Dark")
-ctk.set_default_color_theme("dark-blue")
+import multiprocessing
+import sqlite3
+
+from cache import ConversionCache
+from core import FORMAT_CATEGORIES, SUPPORTED_EXTENSIONS, VALID_INPUTS, merge_batch, resume_jobs, run_batch
+from duplicates import resolve_names
+from engine import ConversionEngine, default_workers
+import journal as batch_journal
+from pages import MULTIPAGE_FORMATS
+from profiles import DEFAULT_PROFILE, PROFILES
+from report import RunReport
+from queue_model import QueueModel
+from queue_view import VirtualQueueList
+from scanner import FolderScanner
+from thumbnails import Thumbnailer
+from transforms import FIT_MODES, parse_size
+from ui_channel import UiChannel
+
+# Sidebar labels -> options["pages"] (see core.PAGE_MODES)
+PAGE_CHOICES = {"First page": "first", "Page per file": "split", "All pages": "all"}
+# Sidebar labels -> (options["anim_width"], options["anim_fps"]) for GIF / animated WebP
+ANIMATION_CHOICES = {
+    "Small (480 px, 12 fps)": (480, 12),
+    "Medium (640 px, 15 fps)": (640, 15),
+    "Large (960 px, 24 fps)": (960, 24),
+    "Original size and rate": (0, 0),
+}
+DEFAULT_ANIMATION = "Medium (640 px, 15 fps)"
 
 class MacConverterPro(ctk.CTk):
     def __init__(self):
+        # Set Theme (here rather than at import, so spawned workers and the CLI never load it)
+        ctk.set_appearance_mode("Dark")
+        ctk.set_default_color_theme("dark-blue")
+
         super().__init__()
 
         # --- Window Config ---
@@ -56,25 +65,34 @@ class MacConverterPro(ctk.CTk):
         self.grid_rowconfigure(0, weight=1)
 
         # --- State Data ---
-        self.files_to_convert = []
-        self.file_widgets = {}
+        self.queue = QueueModel()
+        self.run_progress = (0, 1)
+        self.file_progress = {}
+        self.scanners = []
+        self.last_report = None
         
         # --- Format Definitions ---
-        self.format_categories = {
-            "Image": ["PNG", "JPEG", "JPG", "WEBP", "ICNS", "PDF", "TIFF", "BMP", "ICO", "HEIC", "SVG"],
-            "Audio": ["MP3", "WAV", "FLAC", "AAC", "M4A", "OGG", "WMA", "AIFF"],
-            "Video": ["MP4", "MOV", "AVI", "MKV", "WEBM", "WMV", "FLV", "MPEG", "GIF"]
-        }
+        self.format_categories = FORMAT_CATEGORIES
 
-        self.valid_inputs = {
-            "image": ['.jpg', '.jpeg', '.png', '.heic', '.webp', '.bmp', '.tiff', '.ico', '.pdf', '.svg'],
-            "video": ['.mp4', '.mov', '.avi', '.mkv', '.webm', '.wmv', '.flv', '.mpeg', '.gif'],
-            "audio": ['.mp3', '.wav', '.flac', '.m4a', '.ogg', '.wma', '.aiff', '.aac']
-        }
+        self.valid_inputs = VALID_INPUTS
 
         # --- Build UI ---
         self.create_sidebar()
         self.create_main_area()
+        self.refresh_resume()
+
+        # --- Worker -> UI Messages ---
+        # Background threads only post here; the Tk loop applies them at a fixed frame rate
+        self.channel = UiChannel(self)
+        self.channel.subscribe("scan_batch", self.on_scan_batches, mode="batch")
+        self.channel.subscribe("scan_done", self.on_scan_done)
+        self.channel.subscribe("row_status", self.on_row_statuses, mode="batch")
+        self.channel.subscribe("progress", self.on_progress, mode="latest")
+        self.channel.subscribe("file_progress", self.on_file_progress, mode="batch")
+        self.channel.subscribe("stats", self.on_stats, mode="latest")
+        self.channel.subscribe("thumbnail", self.queue_list.show_thumbnails, mode="batch")
+        self.channel.subscribe("finish", lambda result: self.finish(*result))
+        self.channel.start()
 
     def create_sidebar(self):
         self.sidebar = ctk.CTkFrame(self, width=300, corner_radius=0, fg_color=self.colors["bg_sidebar"])
@@ -149,6 +167,205 @@ class MacConverterPro(ctk.CTk):
         )
         self.format_menu.pack(fill="x", padx=5, pady=(15, 0))
 
+        # Extra Formats: each source is decoded once and written in all of them
+        self.extra_formats = ctk.CTkEntry(
+            self.settings_frame,
+            placeholder_text="Also export as (e.g. webp, jpg)",
+            fg_color=self.colors["btn_default"],
+            border_width=0,
+            text_color=self.colors["text"],
+            height=35,
+            corner_radius=10,
+            font=("Arial", 12)
+        )
+        self.extra_formats.pack(fill="x", padx=5, pady=(8, 0))
+
+        # Encoder Profile
+        ctk.CTkLabel(self.settings_frame, text="ENCODER PROFILE", text_color=self.colors["text_dim"], 
+                    font=("Arial", 11, "bold")).pack(anchor="w", padx=10, pady=(20, 5))
+
+        self.profile_switch = ctk.CTkSegmentedButton(
+            self.settings_frame,
+            values=[name.title() for name in PROFILES],
+            selected_color=self.colors["accent"],
+            selected_hover_color=self.colors["accent_hover"],
+            unselected_color=self.colors["btn_default"],
+            unselected_hover_color=self.colors["btn_hover"],
+            text_color=self.colors["text"],
+            font=("Arial", 12),
+            height=35,
+            corner_radius=8
+        )
+        self.profile_switch.pack(fill="x", padx=5)
+        self.profile_switch.set(DEFAULT_PROFILE.title())
+
+        # Worker Count
+        ctk.CTkLabel(self.settings_frame, text="PARALLEL JOBS", text_color=self.colors["text_dim"], 
+                    font=("Arial", 11, "bold")).pack(anchor="w", padx=10, pady=(20, 5))
+
+        cores = default_workers()
+        worker_choices = ["Auto"] + [str(n) for n in (1, 2, 4, 8, 16, 32) if n < cores] + [str(cores)]
+        self.workers_menu = ctk.CTkOptionMenu(
+            self.settings_frame,
+            values=worker_choices,
+            fg_color=self.colors["btn_default"],
+            button_color=self.colors["btn_default"],
+            button_hover_color=self.colors["btn_hover"],
+            text_color=self.colors["text"],
+            height=35,
+            corner_radius=10,
+            anchor="center",
+            font=("Arial", 13),
+            dropdown_font=("Arial", 13)
+        )
+        self.workers_menu.pack(fill="x", padx=5)
+        self.workers_menu.set("Auto")
+
+        # Multi-Page Sources
+        ctk.CTkLabel(self.settings_frame, text="MULTI-PAGE FILES", text_color=self.colors["text_dim"], 
+                    font=("Arial", 11, "bold")).pack(anchor="w", padx=10, pady=(20, 5))
+
+        self.pages_menu = ctk.CTkOptionMenu(
+            self.settings_frame,
+            values=list(PAGE_CHOICES),
+            fg_color=self.colors["btn_default"],
+            button_color=self.colors["btn_default"],
+            button_hover_color=self.colors["btn_hover"],
+            text_color=self.colors["text"],
+            height=35,
+            corner_radius=10,
+            anchor="center",
+            font=("Arial", 13),
+            dropdown_font=("Arial", 13)
+        )
+        self.pages_menu.pack(fill="x", padx=5)
+        self.pages_menu.set("First page")
+
+        self.merge_switch = ctk.CTkSwitch(
+            self.settings_frame,
+            text="Combine into one PDF/TIFF",
+            progress_color=self.colors["accent"],
+            button_color=self.colors["text"],
+            button_hover_color=self.colors["text_dim"],
+            text_color=self.colors["text_dim"],
+            font=("Arial", 12)
+        )
+        self.merge_switch.pack(anchor="w", padx=10, pady=(15, 0))
+
+        # Resize / Adjust (image mode): applied between decode and encode, see transforms.py
+        ctk.CTkLabel(self.settings_frame, text="RESIZE & ADJUST", text_color=self.colors["text_dim"], 
+                    font=("Arial", 11, "bold")).pack(anchor="w", padx=10, pady=(20, 5))
+
+        resize_row = ctk.CTkFrame(self.settings_frame, fg_color="transparent")
+        resize_row.pack(fill="x", padx=5)
+        self.max_size_entry = ctk.CTkEntry(
+            resize_row,
+            placeholder_text="Max size (e.g. 1920x1080)",
+            fg_color=self.colors["btn_default"],
+            border_width=0,
+            text_color=self.colors["text"],
+            height=35,
+            corner_radius=10,
+            font=("Arial", 12)
+        )
+        self.max_size_entry.pack(side="left", fill="x", expand=True)
+        self.fit_menu = ctk.CTkOptionMenu(
+            resize_row,
+            values=[mode.title() for mode in FIT_MODES],
+            width=80,
+            fg_color=self.colors["btn_default"],
+            button_color=self.colors["btn_default"],
+            button_hover_color=self.colors["btn_hover"],
+            text_color=self.colors["text"],
+            height=35,
+            corner_radius=10,
+            anchor="center",
+            font=("Arial", 13),
+            dropdown_font=("Arial", 13)
+        )
+        self.fit_menu.pack(side="right", padx=(8, 0))
+        self.fit_menu.set("Fit")
+
+        self.rotate_switch = ctk.CTkSwitch(
+            self.settings_frame,
+            text="Auto-rotate (EXIF)",
+            progress_color=self.colors["accent"],
+            button_color=self.colors["text"],
+            button_hover_color=self.colors["text_dim"],
+            text_color=self.colors["text_dim"],
+            font=("Arial", 12)
+        )
+        self.rotate_switch.pack(anchor="w", padx=10, pady=(15, 0))
+
+        self.flatten_switch = ctk.CTkSwitch(
+            self.settings_frame,
+            text="Flatten transparency (white)",
+            progress_color=self.colors["accent"],
+            button_color=self.colors["text"],
+            button_hover_color=self.colors["text_dim"],
+            text_color=self.colors["text_dim"],
+            font=("Arial", 12)
+        )
+        self.flatten_switch.pack(anchor="w", padx=10, pady=(15, 0))
+
+        # GIF / Animated WebP
+        ctk.CTkLabel(self.settings_frame, text="GIF / ANIMATED WEBP", text_color=self.colors["text_dim"], 
+                    font=("Arial", 11, "bold")).pack(anchor="w", padx=10, pady=(20, 5))
+
+        self.animation_menu = ctk.CTkOptionMenu(
+            self.settings_frame,
+            values=list(ANIMATION_CHOICES),
+            fg_color=self.colors["btn_default"],
+            button_color=self.colors["btn_default"],
+            button_hover_color=self.colors["btn_hover"],
+            text_color=self.colors["text"],
+            height=35,
+            corner_radius=10,
+            anchor="center",
+            font=("Arial", 13),
+            dropdown_font=("Arial", 13)
+        )
+        self.animation_menu.pack(fill="x", padx=5)
+        self.animation_menu.set(DEFAULT_ANIMATION)
+
+        # Conversion Cache
+        self.cache_switch = ctk.CTkSwitch(
+            self.settings_frame,
+            text="Reuse unchanged results",
+            progress_color=self.colors["accent"],
+            button_color=self.colors["text"],
+            button_hover_color=self.colors["text_dim"],
+            text_color=self.colors["text_dim"],
+            font=("Arial", 12)
+        )
+        self.cache_switch.pack(anchor="w", padx=10, pady=(15, 0))
+        self.cache_switch.select()
+
+        # Batched fsync, for removable drives that may be unplugged right after a run
+        self.sync_switch = ctk.CTkSwitch(
+            self.settings_frame,
+            text="Flush outputs to disk",
+            progress_color=self.colors["accent"],
+            button_color=self.colors["text"],
+            button_hover_color=self.colors["text_dim"],
+            text_color=self.colors["text_dim"],
+            font=("Arial", 12)
+        )
+        self.sync_switch.pack(anchor="w", padx=10, pady=(15, 0))
+
+        # Live Stats (stage breakdown and throughput under the progress bar)
+        self.stats_switch = ctk.CTkSwitch(
+            self.settings_frame,
+            text="Show live stats",
+            command=self.toggle_stats,
+            progress_color=self.colors["accent"],
+            button_color=self.colors["text"],
+            button_hover_color=self.colors["text_dim"],
+            text_color=self.colors["text_dim"],
+            font=("Arial", 12)
+        )
+        self.stats_switch.pack(anchor="w", padx=10, pady=(15, 0))
+
         # --- Main Action ---
         self.btn_convert = ctk.CTkButton(
             self.sidebar,
@@ -164,6 +381,21 @@ class MacConverterPro(ctk.CTk):
         )
         self.btn_convert.grid(row=9, column=0, padx=25, pady=40, sticky="ew")
 
+        # Shown only when an earlier batch was interrupted (see refresh_resume)
+        self.btn_resume = ctk.CTkButton(
+            self.sidebar,
+            text="RESUME INTERRUPTED BATCH",
+            font=ctk.CTkFont(size=12, weight="bold"),
+            height=40,
+            corner_radius=12,
+            fg_color="transparent",
+            hover_color=self.colors["btn_default"],
+            border_width=1,
+            border_color=self.colors["accent"],
+            text_color=self.colors["text"],
+            command=self.resume_batch
+        )
+
         # --- Signature ---
         self.lbl_sig = ctk.CTkLabel(
             self.sidebar, 
@@ -192,6 +424,7 @@ class MacConverterPro(ctk.CTk):
         new_values = self.format_categories[value]
         self.format_menu.configure(values=new_values)
         self.format_menu.set(new_values[0])
+        self.extra_formats.delete(0, "end")
 
     def create_main_area(self):
         self.main_frame = ctk.CTkFrame(self, fg_color="transparent")
@@ -219,16 +452,35 @@ class MacConverterPro(ctk.CTk):
         )
         self.lbl_status.pack(side="right", anchor="n", pady=10)
 
+        # Shown only while a folder scan is running
+        self.btn_cancel_scan = ctk.CTkButton(
+            self.head,
+            text="Cancel Scan",
+            width=110,
+            height=34,
+            fg_color="transparent",
+            hover_color=self.colors["error"],
+            border_width=1,
+            border_color=self.colors["btn_default"],
+            text_color=self.colors["text_dim"],
+            font=("Arial", 12, "bold"),
+            corner_radius=17,
+            command=self.cancel_scans
+        )
+
         # List Area
-        self.scroll_list = ctk.CTkScrollableFrame(
-            self.main_frame, 
-            fg_color="transparent", # Transparent to show main bg
-            corner_radius=0
+        # Virtualized: only the rows on screen exist as widgets, however long the queue gets.
+        # Previews are rendered off the Tk thread and posted back like any other update.
+        self.thumbnailer = Thumbnailer(lambda path, img: self.channel.post("thumbnail", (path, img)))
+        self.queue_list = VirtualQueueList(
+            self.main_frame,
+            model=self.queue,
+            colors=self.colors,
+            valid_inputs=self.valid_inputs,
+            on_remove=self.remove_item,
+            thumbnails=self.thumbnailer
         )
-        self.scroll_list.pack(fill="both", expand=True)
-        
-        # Hack for custom scrollbar visuals (CTK defaults are okay, but this keeps it clean)
-        self.scroll_list._scrollbar.configure(width=0) 
+        self.queue_list.pack(fill="both", expand=True)
 
         # Progress Area
         self.progress_frame = ctk.CTkFrame(self.main_frame, fg_color=self.colors["bg_sidebar"], corner_radius=15, height=60)
@@ -249,235 +501,293 @@ class MacConverterPro(ctk.CTk):
         self.progress.set(0)
         self.progress.pack(side="right", fill="x", expand=True, padx=20)
 
+        # Shown once a run has finished
+        self.btn_export = ctk.CTkButton(
+            self.progress_frame,
+            text="Export Report",
+            width=110,
+            height=30,
+            fg_color="transparent",
+            hover_color=self.colors["btn_default"],
+            border_width=1,
+            border_color=self.colors["btn_default"],
+            text_color=self.colors["text_dim"],
+            font=("Arial", 12, "bold"),
+            corner_radius=15,
+            command=self.export_report
+        )
+
+        # Stage breakdown / throughput, packed only while "Show live stats" is on
+        self.stats_lbl = ctk.CTkLabel(self.main_frame, text="", font=("Arial", 11), text_color=self.colors["text_dim"], anchor="w")
+
     # --- Logic ---
 
     def add_files(self):
         files = filedialog.askopenfilenames()
-        for f in files: self.add_item(f)
-        self.update_count()
+        self.add_items(files)
 
     def add_folder(self):
         folder = filedialog.askdirectory()
-        if folder:
-            all_valid = self.valid_inputs['image'] + self.valid_inputs['video'] + self.valid_inputs['audio']
-            for root, _, files in os.walk(folder):
-                for file in files:
-                    if Path(file).suffix.lower() in all_valid:
-                        self.add_item(os.path.join(root, file))
+        if not folder: return
+
+        # Walk on a worker thread; batches stream into the queue as they are found
+        scanner = FolderScanner(folder, SUPPORTED_EXTENSIONS, self.channel)
+        self.scanners.append(scanner)
+        scanner.start()
+        self.btn_cancel_scan.pack(side="right", anchor="n", pady=10, padx=(0, 10))
+
+    def on_scan_batches(self, batches):
+        for batch in batches: self.queue.extend(batch)
+        self.queue_list.refresh()
+        if self.scanners:
+            found = sum(s.found for s in self.scanners)
+            self.lbl_status.configure(text=f"Scanning... {found:,} found")
+
+    def on_scan_done(self, scanner):
+        self.scanners.remove(scanner)
+        if not self.scanners:
+            self.btn_cancel_scan.pack_forget()
             self.update_count()
 
+    def cancel_scans(self):
+        for scanner in self.scanners: scanner.cancel()
+
+    def add_items(self, filepaths):
+        # One model update and one redraw per batch, however many files come in
+        if self.queue.extend(filepaths): self.queue_list.refresh()
+        self.update_count()
+
     def add_item(self, filepath):
-        if filepath in self.files_to_convert: return
-        self.files_to_convert.append(filepath)
-        
-        # Create Row (Card Style)
-        row = ctk.CTkFrame(
-            self.scroll_list, 
-            fg_color=self.colors["item_bg"], 
-            corner_radius=16, 
-            height=70,
-            border_width=1,
-            border_color="#334155"
-        )
-        row.pack(fill="x", pady=6, padx=5)
-        
-        # Determine Icon & Color
-        ext = Path(filepath).suffix.lower()
-        icon, color = "📄", self.colors["text_dim"]
-        if ext in self.valid_inputs['audio']: icon, color = "🎵", "#f472b6" # Pink
-        elif ext in self.valid_inputs['video']: icon, color = "🎬", "#60a5fa" # Blue
-        elif ext in self.valid_inputs['image']: icon, color = "🖼️", "#34d399" # Emerald
-
-        # Icon Box
-        icon_box = ctk.CTkFrame(row, width=50, height=50, fg_color=self.colors["bg_main"], corner_radius=12)
-        icon_box.pack(side="left", padx=(10, 15), pady=10)
-        icon_box.pack_propagate(False)
-        ctk.CTkLabel(icon_box, text=icon, font=("Arial", 20)).pack(expand=True)
-
-        # Text Info
-        info_box = ctk.CTkFrame(row, fg_color="transparent")
-        info_box.pack(side="left", fill="both", expand=True, pady=10)
-        
-        ctk.CTkLabel(info_box, text=Path(filepath).name, text_color=self.colors["text"], 
-                    font=("SF Pro Display", 14, "bold"), anchor="w").pack(fill="x")
-        
-        ctk.CTkLabel(info_box, text=f"{ext.upper()} File", text_color=self.colors["text_dim"], 
-                    font=("Arial", 11), anchor="w").pack(fill="x")
-        
-        # Delete Button
-        btn = ctk.CTkButton(
-            row, 
-            text="×", 
-            width=35, 
-            height=35, 
-            fg_color="transparent", 
-            hover_color=self.colors["error"], 
-            text_color=self.colors["text_dim"], 
-            font=("Arial", 20), 
-            corner_radius=10,
-            command=lambda p=filepath: self.remove_item(p)
-        )
-        btn.pack(side="right", padx=15)
-        
-        self.file_widgets[filepath] = row
+        self.add_items([filepath])
 
     def remove_item(self, filepath):
-        if filepath in self.files_to_convert: self.files_to_convert.remove(filepath)
-        if filepath in self.file_widgets:
-            self.file_widgets[filepath].destroy()
-            del self.file_widgets[filepath]
+        if self.queue.remove(filepath): self.queue_list.refresh()
         self.update_count()
 
     def clear_list(self):
-        self.files_to_convert = []
-        self.file_widgets = {}
-        for w in self.scroll_list.winfo_children(): w.destroy()
+        self.queue.clear()
+        self.queue_list.scroll_to(0)
         self.update_count()
         self.progress.set(0)
         self.progress_lbl.configure(text="Progress")
 
     def update_count(self):
-        self.lbl_status.configure(text=f"{len(self.files_to_convert)} Files Ready")
+        self.lbl_status.configure(text=f"{len(self.queue)} Files Ready")
 
     def start_conversion_thread(self):
-        if not self.files_to_convert: return messagebox.showwarning("Empty Queue", "Please add files first.")
-        
-        out_dir = filedialog.askdirectory()
-        if not out_dir: return
-
-        self.btn_convert.configure(state="disabled", text="PROCESSING...", fg_color=self.colors["btn_default"])
-        threading.Thread(target=self.convert_process, args=(out_dir,), daemon=True).start()
+        if not len(self.queue): return messagebox.showwarning("Empty Queue", "Please add files first.")
 
-    def convert_process(self, out_dir):
+        # Read every widget here, on the Tk thread; the worker only gets plain values
         mode = self.mode_switch.get()
         fmt = self.format_menu.get().lower()
-        
-        total = len(self.files_to_convert)
-        success = 0
-        skipped = 0
-        errors = []
+        extra = [f.strip().lower().lstrip(".") for f in self.extra_formats.get().split(",") if f.strip()]
+        unknown = [f for f in extra if f.upper() not in self.format_categories[mode]]
+        if unknown:
+            return messagebox.showwarning("Also Export As", f"{', '.join(unknown).upper()} is not a {mode.lower()} format.")
+        formats = list(dict.fromkeys([fmt] + extra))
+        if len(formats) > 1: fmt = tuple(formats)
+        max_size = self.max_size_entry.get().strip()
+        try:
+            max_size = parse_size(max_size) if max_size else None
+        except ValueError:
+            return messagebox.showwarning("Max Size", f"Use a size like 1920 or 1200x630, not \"{max_size}\".")
+
+        merge_path = None
+        if self.merge_switch.get() and mode == "Image" and fmt in MULTIPAGE_FORMATS:
+            merge_path = filedialog.asksaveasfilename(defaultextension=f".{fmt}", filetypes=[(fmt.upper(), f"*.{fmt}")])
+            if not merge_path: return
+            out_dir = str(Path(merge_path).parent)
+        else:
+            out_dir = filedialog.askdirectory()
+            if not out_dir: return
+
+        options = {"profile": self.profile_switch.get().lower()}
+        pages = PAGE_CHOICES[self.pages_menu.get()]
+        if pages != "first": options["pages"] = pages
+        if mode == "Image":
+            if max_size: options.update(max_size=max_size, fit=self.fit_menu.get().lower())
+            if self.rotate_switch.get(): options["auto_rotate"] = True
+            if self.flatten_switch.get(): options["flatten"] = True
+        if mode == "Video":
+            options["anim_width"], options["anim_fps"] = ANIMATION_CHOICES[self.animation_menu.get()]
+        # Same-named sources get numbered outputs instead of overwriting each other
+        jobs = resolve_names((filepath, mode, fmt, out_dir, options) for filepath in self.queue.snapshot())
+        self.launch_batch(jobs, merge_path=merge_path)
+
+    def resume_batch(self):
+        try:
+            journal = batch_journal.find()
+        except (OSError, ValueError) as e:
+            return messagebox.showerror("Resume", f"Could not read the interrupted batch:\n{e}")
+        if journal is None: return self.refresh_resume()
+
+        pending = resume_jobs(journal)
+        self.add_items([job[0] for job in pending])
+        self.launch_batch(pending, journal=journal, total=len(journal.jobs))
+
+    def refresh_resume(self):
+        if batch_journal.unfinished():
+            self.btn_resume.grid(row=8, column=0, padx=25, pady=(20, 0), sticky="ew")
+        else:
+            self.btn_resume.grid_remove()
+
+    def launch_batch(self, jobs, merge_path=None, journal=None, total=None):
+        choice = self.workers_menu.get()
+        workers = None if choice == "Auto" else int(choice)
+        use_cache = bool(self.cache_switch.get())
+        sync = bool(self.sync_switch.get())
+        total = total or len(jobs)
+        done = total - len(jobs)
+
+        self.queue.reset_status()
+        for job in jobs: self.queue.set_status(job[0], "processing")
+        self.queue_list.refresh_statuses()
+        self.progress_lbl.configure(text=f"Converting {done} of {total}...", text_color=self.colors["accent"])
+        self.run_progress = (done, total)
+        self.file_progress = {}
 
-        for i, filepath in enumerate(self.files_to_convert):
-            self.progress_lbl.configure(text=f"Converting {i+1} of {total}...", text_color=self.colors["accent"])
-            
-            if filepath in self.file_widgets:
-                self.file_widgets[filepath].configure(border_width=2, border_color=self.colors["accent"])
+        self.btn_convert.configure(state="disabled", text="PROCESSING...", fg_color=self.colors["btn_default"])
+        self.btn_resume.configure(state="disabled")
+        pinned = self.queue.pinned()
+        threading.Thread(target=self.convert_process, args=(jobs, workers, use_cache, merge_path, journal, done, total, pinned, sync), daemon=True).start()
 
-            try:
-                ext = Path(filepath).suffix.lower()
-                stem = Path(filepath).stem
-                out_path = os.path.join(out_dir, f"{stem}.{fmt}")
-                
-                # --- IMAGE MODE ---
-                if mode == "Image":
-                    if ext in self.valid_inputs['image']:
-                        # Handle SVG input
-                        if ext == '.svg':
-                            if not SVG_SUPPORT:
-                                raise ValueError("SVG support requires cairosvg. Install with: pip install cairosvg")
-                            # Convert SVG to PNG first, then process
-                            png_data = cairosvg.svg2png(url=filepath)
-                            img = Image.open(io.BytesIO(png_data))
-                        else:
-                            img = Image.open(filepath)
-                        
-                        try:
-                            # Handle SVG output
-                            if fmt == 'svg':
-                                if not SVG_SUPPORT:
-                                    raise ValueError("SVG support requires cairosvg. Install with: pip install cairosvg")
-                                # Convert image to PNG bytes, then embed in SVG
-                                if img.mode != 'RGBA': img = img.convert('RGBA')
-                                png_buffer = io.BytesIO()
-                                img.save(png_buffer, format='PNG')
-                                png_data = png_buffer.getvalue()
-                                png_base64 = base64.b64encode(png_data).decode('utf-8')
-                                
-                                # Create SVG wrapper with embedded PNG
-                                width, height = img.size
-                                svg_content = f'''<?xml version="1.0" encoding="UTF-8"?>
-<svg width="{width}" height="{height}" xmlns="http://www.w3.org/2000/svg">
-  <image width="{width}" height="{height}" href="data:image/png;base64,{png_base64}"/>
-</svg>'''
-                                with open(out_path, 'w', encoding='utf-8') as f:
-                                    f.write(svg_content)
-                            elif fmt == 'icns':
-                                if img.mode != 'RGBA': img = img.convert('RGBA')
-                                img = img.resize((1024, 1024), Image.Resampling.LANCZOS)
-                                img.save(out_path, format='ICNS')
-                            else:
-                                if fmt in ['jpeg', 'jpg', 'bmp'] and img.mode in ('RGBA', 'LA'):
-                                    img = img.convert('RGB')
-                                img.save(out_path, quality=95)
-                        finally:
-                            img.close()
-                        
-                        success += 1
-                        self.mark_row(filepath, "success")
-                    else:
-                        skipped += 1
-                        self.mark_row(filepath, "warning")
-
-                # --- VIDEO MODE ---
-                elif mode == "Video":
-                    if ext in self.valid_inputs['video']:
-                        clip = VideoFileClip(filepath)
-                        if fmt == 'gif':
-                            clip.write_gif(out_path, verbose=False, logger=None)
-                        else:
-                            codec = 'libvpx' if fmt == 'webm' else 'libx264'
-                            clip.write_videofile(out_path, codec=codec, audio_codec='aac', verbose=False, logger=None)
-                        clip.close()
-                        success += 1
-                        self.mark_row(filepath, "success")
-                    else:
-                        skipped += 1
-                        self.mark_row(filepath, "warning")
-
-                # --- AUDIO MODE ---
-                elif mode == "Audio":
-                    if ext in self.valid_inputs['audio'] or ext in self.valid_inputs['video']:
-                        clip = AudioFileClip(filepath)
-                        clip.write_audiofile(out_path, verbose=False, logger=None)
-                        clip.close()
+    def convert_process(self, jobs, workers, use_cache, merge_path=None, journal=None, done=0, total=None, pinned=(), sync=False):
+        total = total or len(jobs)
+        success = 0
+        cached = 0
+        skipped = 0
+        report = RunReport()
+        cache = None
+        failure = None
+        completed = False
+
+        # Anything going wrong outside the per-file handling (journal, cache, engine)
+        # still ends in a "finish", so the window never stays stuck mid-batch
+        try:
+            if use_cache and not merge_path:
+                try:
+                    cache = ConversionCache()
+                except (OSError, sqlite3.Error):
+                    cache = None  # Unwritable cache folder; just convert everything
+
+            # Record progress so a crash or quit mid-batch can be resumed; a merge is
+            # a single atomic file, so there is nothing to resume part way
+            if journal is None and not merge_path:
+                try:
+                    journal = batch_journal.BatchJournal.create(jobs)
+                except OSError:
+                    journal = None
+
+            # Results arrive in completion order, so rows light up as soon as their file is done
+            report_progress = lambda job, fraction: self.channel.post("file_progress", (job[0], fraction))
+
+            with ConversionEngine(workers=workers) as engine:
+                if merge_path:
+                    results = merge_batch(jobs, merge_path)
+                else:
+                    results = run_batch(engine, jobs, cache=cache, on_progress=report_progress, journal=journal, pinned=pinned, sync=sync)
+                for job, result, error in results:
+                    filepath = job[0]
+                    done += 1
+                    report.add(job, result, error)
+                    if error is not None:
+                        self.channel.post("row_status", (filepath, "error"))
+                    elif result["status"] in ("success", "cached"):
                         success += 1
-                        self.mark_row(filepath, "success")
+                        if result["status"] == "cached": cached += 1
+                        self.channel.post("row_status", (filepath, "success"))
                     else:
                         skipped += 1
-                        self.mark_row(filepath, "warning")
-
-            except Exception as e:
-                errors.append(f"{stem}: {e}")
-                self.mark_row(filepath, "error")
-
-            self.progress.set((i + 1) / total)
-
-        self.after(0, lambda: self.finish(success, skipped, errors))
-
-    def mark_row(self, filepath, status):
-        if filepath in self.file_widgets:
-            color = self.colors.get(status, self.colors["item_bg"])
-            try: 
-                # If success/error, fill the card slightly
-                if status == "success":
-                    self.file_widgets[filepath].configure(border_color=self.colors["success"], border_width=2)
-                elif status == "error":
-                    self.file_widgets[filepath].configure(border_color=self.colors["error"], border_width=2)
-                elif status == "warning":
-                    self.file_widgets[filepath].configure(border_color=self.colors["warning"], border_width=2)
-            except: pass
-
-    def finish(self, success, skipped, errors):
+                        self.channel.post("row_status", (filepath, "warning"))
+
+                    self.channel.post("progress", (done, total))
+                    self.channel.post("stats", report.stats_line())
+            completed = True
+        except Exception as e:
+            failure = e
+        finally:
+            try:
+                if cache is not None: cache.close()
+                # Only a batch that ran to the end is done; otherwise it stays resumable
+                if journal is not None and completed: journal.finish()
+                elif journal is not None: journal.close()
+            except (OSError, sqlite3.Error):
+                pass
+            errors = [f"{Path(filepath).stem}: {error}" for filepath, error in report.errors()]
+            if failure is not None: errors.insert(0, f"Batch stopped: {failure}")
+            self.channel.post("finish", (success, skipped, errors, cached, report))
+
+    def on_row_statuses(self, updates):
+        for filepath, status in updates:
+            self.queue.set_status(filepath, status)
+            self.file_progress.pop(filepath, None)
+        self.queue_list.refresh_statuses()
+
+    def on_progress(self, progress):
+        self.run_progress = progress
+        self.show_progress()
+
+    def on_file_progress(self, updates):
+        # Fractions from long ffmpeg jobs, so the bar moves while a big video is encoding
+        for filepath, fraction in updates:
+            if self.queue.status(filepath) == "processing": self.file_progress[filepath] = fraction
+        self.show_progress()
+
+    def show_progress(self):
+        done, total = self.run_progress
+        text = f"Converting {done} of {total}..."
+        if len(self.file_progress) == 1:
+            (filepath, fraction), = self.file_progress.items()
+            text += f"  {Path(filepath).name} {fraction:.0%}"
+        self.progress_lbl.configure(text=text)
+        self.progress.set((done + sum(self.file_progress.values())) / total)
+
+    def on_stats(self, text):
+        self.stats_lbl.configure(text=text)
+
+    def toggle_stats(self):
+        if self.stats_switch.get():
+            self.stats_lbl.pack(fill="x", padx=20, pady=(8, 0))
+        else:
+            self.stats_lbl.pack_forget()
+
+    def export_report(self):
+        if self.last_report is None: return
+        path = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            initialfile="conversion-report.json",
+            filetypes=[("JSON", "*.json"), ("CSV", "*.csv")]
+        )
+        if not path: return
+        try:
+            self.last_report.save(path)
+        except OSError as e:
+            messagebox.showerror("Export Report", f"Could not save the report:\n{e}")
+
+    def finish(self, success, skipped, errors, cached=0, report=None):
         self.btn_convert.configure(state="normal", text="START CONVERSION", fg_color=self.colors["accent"])
+        self.btn_resume.configure(state="normal")
+        self.refresh_resume()
         self.progress_lbl.configure(text="Completed", text_color=self.colors["success"])
         self.lbl_status.configure(text="All Done")
         
         msg = f"Completed: {success}"
+        if cached > 0: msg += f"\nReused (unchanged): {cached}"
         if skipped > 0: msg += f"\nSkipped: {skipped} (Incompatible)"
-        if errors: msg += f"\nErrors: {len(errors)}"
+        if errors:
+            msg += f"\nErrors: {len(errors)}"
+            msg += "".join(f"\n  • {error}" for error in errors[:3])
+            if len(errors) > 3: msg += f"\n  … and {len(errors) - 3} more (see Export Report)"
+
+        self.last_report = report
+        if report is not None: self.btn_export.pack(side="right", padx=(0, 20), before=self.progress)
         
         messagebox.showinfo("Report", msg)
 
 if __name__ == "__main__":
+    # Needed so the frozen .app can spawn image worker processes
+    multiprocessing.freeze_support()
     app = MacConverterPro()
-    app.mainloop()
\ No newline at end of file
+    app.mainloop()
+    # Drop previews still waiting so quitting never waits on them
+    app.thumbnailer.shutdown()
\ No newline at end of file
@@ -0,0 +1,559 @@
+import os
+from pathlib import Path
+from PIL import Image, ImageSequence
+import contextlib
+import functools
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import io
+import time
+
+import duplicates
+import ffmpeg_backend
+import icons
+import profiles
+import scheduler
+import svg
+import transforms
+from output import SyncBatch, atomic_output, remove_partials, remove_stale_staging, write_buffer
+from pages import MULTIPAGE_FORMATS, open_writer, page_output_path
+from report import StageTimer
+
+# --- Lazy Backends ---
+# Each heavy backend is imported the first time a job needs it, so starting the
+# window (or an image-only CLI run) never pays for moviepy/numpy/imageio.
+
+@functools.cache
+def load_moviepy():
+    # Import the clip classes directly; moviepy.editor also drags in every fx module
+    from moviepy.video.io.VideoFileClip import VideoFileClip
+    from moviepy.audio.io.AudioFileClip import AudioFileClip
+    return VideoFileClip, AudioFileClip
+
+@functools.cache
+def load_cairosvg():
+    try:
+        import cairosvg
+        return cairosvg
+    except (ImportError, OSError):
+        # OSError occurs when cairo library is not installed on system
+        return None
+
+@functools.cache
+def load_heif():
+    # Register HEIF opener for Apple formats
+    import pillow_heif
+    pillow_heif.register_heif_opener()
+
+HEIF_EXTENSIONS = {'.heic', '.heif'}
+
+# --- Format Definitions ---
+FORMAT_CATEGORIES = {
+    "Image": ["PNG", "JPEG", "JPG", "WEBP", "ICNS", "PDF", "TIFF", "BMP", "ICO", "HEIC", "SVG"],
+    "Audio": ["MP3", "WAV", "FLAC", "AAC", "M4A", "OGG", "WMA", "AIFF"],
+    "Video": ["MP4", "MOV", "AVI", "MKV", "WEBM", "WMV", "FLV", "MPEG", "GIF", "WEBP"]
+}
+
+VALID_INPUTS = {
+    # No PDF: Pillow can write PDF files but not read them
+    "image": ['.jpg', '.jpeg', '.png', '.heic', '.heif', '.webp', '.bmp', '.tiff', '.ico', '.svg'],
+    "video": ['.mp4', '.mov', '.avi', '.mkv', '.webm', '.wmv', '.flv', '.mpeg', '.gif'],
+    "audio": ['.mp3', '.wav', '.flac', '.m4a', '.ogg', '.wma', '.aiff', '.aac']
+}
+
+SUPPORTED_EXTENSIONS = frozenset(ext for exts in VALID_INPUTS.values() for ext in exts)
+
+# --- Conversion Job ---
+
+def output_path(filepath, fmt, out_dir, stem=None):
+    # stem overrides the source's name (see duplicates.resolve_names)
+    return os.path.join(out_dir, f"{stem or Path(filepath).stem}.{fmt}")
+
+def job_formats(fmt):
+    # A job targets one format ("png") or several at once (["png", "webp", "jpg"]):
+    # the source is then decoded once and every output is encoded from that
+    return [fmt] if isinstance(fmt, str) else list(fmt)
+
+# --- Image Decoding ---
+
+# Largest pixel size each icon container stores; decoding beyond this is wasted work
+ICON_MAX_SIZE = {'icns': (1024, 1024), 'ico': (256, 256)}
+RESIZABLE_MODES = ('RGB', 'RGBA', 'L', 'LA')
+
+def open_image(filepath, max_size=None):
+    # Image.open only reads the header. Asking for a draft before the first load()
+    # lets JPEG decode at 1/2, 1/4 or 1/8 scale inside libjpeg and HEIC use an
+    # embedded thumbnail, whenever the result still covers max_size. Other
+    # formats ignore the request and decode at full size.
+    img = Image.open(filepath)
+    if max_size: img.draft(None, max_size)
+    return img
+
+def resize_image(img, size):
+    # reducing_gap lets Pillow box-reduce by whole factors before the LANCZOS pass,
+    # which is much cheaper on camera-sized sources with no visible difference
+    if img.mode not in RESIZABLE_MODES: img = img.convert('RGBA')
+    return img.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+def square_icon(img, size):
+    # Top level of an icon pyramid. Resize before converting so the RGBA copy is
+    # made at icon size, not at source size.
+    icon = resize_image(img, (size, size))
+    return icon if icon.mode == 'RGBA' else icon.convert('RGBA')
+
+def open_source(filepath, fmt, options):
+    ext = Path(filepath).suffix.lower()
+    formats = job_formats(fmt)
+    if ext in HEIF_EXTENSIONS or 'heic' in formats: load_heif()
+    # Decode at reduced size only when every target is an icon
+    max_size = max(ICON_MAX_SIZE[f] for f in formats) if all(f in ICON_MAX_SIZE for f in formats) else None
+
+    # Handle SVG input: rendered straight into a Pillow image, at icon size for icon targets
+    if ext == '.svg':
+        if load_cairosvg() is None:
+            raise ValueError("SVG support requires cairosvg. Install with: pip install cairosvg")
+        width = options.get('svg_width') or (max_size[0] if max_size else None)
+        return svg.rasterize(filepath, dpi=options.get('svg_dpi') or svg.DEFAULT_DPI, width=width, height=options.get('svg_height'))
+    # A resize box caps what is needed anyway, icon targets included
+    return open_image(filepath, transforms.draft_size(transforms.settings(options)) or max_size)
+
+def transform_image(img, transform, timer):
+    # -> img with the job's transforms applied (see transforms.py), or img untouched
+    if not transform: return img
+    with timer.stage('decode'):
+        img.load()
+    with timer.stage('transform'):
+        return transforms.apply(img, transform)
+
+def save_image(img, filepath, out_path, fmt, profile=profiles.DEFAULT_PROFILE, page=1, timer=None, variant=None):
+    timer = timer or StageTimer()
+    save_options = profiles.image_options(fmt, profile)
+    # Everything but SVG is encoded into memory first (write_encoded), so only
+    # SVG is worth staging locally before it goes to a slow volume
+    with atomic_output(out_path, staged=fmt == 'svg') as target:
+        write_image(img, filepath, target, fmt, save_options, page, timer, variant)
+
+def save_targets(img, filepath, targets, profile=profiles.DEFAULT_PROFILE, page=1, timer=None, variant=None):
+    # targets: {fmt: out_path}. The source is decoded once, then each encoder runs
+    # on its own thread; Pillow releases the GIL while encoding, so they overlap.
+    # variant names the transforms img went through (transforms.key), for the icon cache.
+    timer = timer or StageTimer()
+    if len(targets) == 1:
+        (fmt, out_path), = targets.items()
+        save_image(img, filepath, out_path, fmt, profile, page, timer, variant)
+        return [out_path]
+
+    with timer.stage('decode'):
+        img.load()
+    timers = {fmt: StageTimer() for fmt in targets}
+
+    # Image.save() keeps per-call state (encoderinfo) on the Image object, so two
+    # saves of one object must not overlap. Icon targets only read img (they save
+    # their own pyramid levels) and share it, as does the first other format; each
+    # further one gets its own copy of the decoded pixels.
+    sources = {}
+    with timer.stage('transform'):
+        for fmt in targets:
+            shared = fmt in ICON_MAX_SIZE or not any(f not in ICON_MAX_SIZE for f in sources)
+            sources[fmt] = img if shared else img.copy()
+
+    def save(fmt):
+        save_image(sources[fmt], filepath, targets[fmt], fmt, profile, page, timers[fmt], variant)
+
+    with ThreadPoolExecutor(max_workers=min(len(targets), os.cpu_count() or 1)) as pool:
+        for future in [pool.submit(save, fmt) for fmt in targets]:
+            future.result()
+    # Encoder seconds are summed across threads, like stage totals across workers
+    for fmt_timer in timers.values():
+        timer.add(fmt_timer.timings)
+    return list(targets.values())
+
+# Pillow format names for saving to a buffer (looking them up with
+# Image.registered_extensions() would import every Pillow plugin)
+PILLOW_FORMATS = {
+    'png': 'PNG', 'jpeg': 'JPEG', 'jpg': 'JPEG', 'webp': 'WEBP', 'tiff': 'TIFF',
+    'bmp': 'BMP', 'pdf': 'PDF', 'heic': 'HEIF',
+}
+
+def write_encoded(out_path, timer, encode):
+    # Encode into memory, then write in one go, so encoder time and disk time are
+    # measured apart and the disk only sees one sequential write (see output.py).
+    # Only used for single images; streamed outputs skip this.
+    buffer = io.BytesIO()
+    with timer.stage('encode'):
+        encode(buffer)
+    with timer.stage('write'):
+        write_buffer(out_path, buffer.getbuffer())
+
+def icon_base(img, size, timer):
+    # Only called when the pyramid is not cached, so only then is the source decoded
+    with timer.stage('decode'):
+        img.load()
+    return square_icon(img, size)
+
+def write_image(img, filepath, out_path, fmt, save_options, page=1, timer=None, variant=None):
+    timer = timer or StageTimer()
+    # Icons decode lazily in icon_base: a cached pyramid needs no pixels at all
+    if fmt not in ICON_MAX_SIZE:
+        with timer.stage('decode'):
+            img.load()
+
+    # Handle SVG output: the raster is embedded as a base64 PNG, streamed to disk
+    if fmt == 'svg':
+        # PNG can hold these modes as they are; only convert (= copy) the rest
+        with timer.stage('transform'):
+            if img.mode not in svg.PNG_MODES: img = img.convert('RGBA')
+        with timer.stage('encode'):
+            svg.write_embedded(img, out_path, **save_options)
+    elif fmt == 'icns':
+        with timer.stage('transform'):
+            levels = icons.get_pyramid(filepath, icons.ICNS_SIZES[0], lambda size: icon_base(img, size, timer), page, variant)
+        write_encoded(out_path, timer, lambda f: icons.save_icns(levels, f))
+    elif fmt == 'ico':
+        # ICO never upscales: stop at the largest standard size the source covers
+        top = next((s for s in icons.ICO_SIZES if s <= min(img.size)), icons.ICO_SIZES[-1])
+        with timer.stage('transform'):
+            levels = icons.get_pyramid(filepath, top, lambda size: icon_base(img, size, timer), page, variant)
+        write_encoded(out_path, timer, lambda f: icons.save_ico(levels, f, top))
+    else:
+        with timer.stage('transform'):
+            # Drop alpha for formats without it; grey stays grey (a third of the copy)
+            if fmt in ['jpeg', 'jpg', 'bmp'] and img.mode in ('RGBA', 'LA'):
+                img = img.convert('L' if img.mode == 'LA' else 'RGB')
+        write_encoded(out_path, timer, lambda f: img.save(f, format=PILLOW_FORMATS[fmt], **save_options))
+
+# --- Multi-Page Sources ---
+# TIFF, HEIC and friends can hold several pages. options["pages"] decides what
+# happens to them:
+#   "first" - convert page 1 only (the default)
+#   "split" - one numbered output per page (scan_p001.png, scan_p002.png, ...)
+#   "all"   - keep every page in one PDF/TIFF; other formats fall back to "split"
+# Pages are decoded one at a time via ImageSequence, so memory stays at one page,
+# and each decoded page is handed to every target format before moving on.
+PAGE_MODES = ('first', 'split', 'all')
+
+def convert_pages(img, filepath, targets, pages, profile=profiles.DEFAULT_PROFILE, timer=None, transform=None):
+    # targets: {fmt: out_path}
+    timer = timer or StageTimer()
+    variant = transforms.key(transform)
+    outputs = {fmt: [] for fmt in targets}
+    with contextlib.ExitStack() as stack:
+        writers = {}
+        for fmt, out_path in targets.items():
+            if pages == 'all' and fmt in MULTIPAGE_FORMATS:
+                target = stack.enter_context(atomic_output(out_path))
+                writers[fmt] = stack.enter_context(open_writer(target, fmt, profiles.image_options(fmt, profile)))
+                outputs[fmt].append(out_path)
+
+        for index, frame in enumerate(ImageSequence.Iterator(img), 1):
+            with timer.stage('decode'):
+                frame.load()
+            frame = transform_image(frame, transform, timer)
+            # Streamed writers encode and write in one go; it counts as encode
+            with timer.stage('encode'):
+                for writer in writers.values():
+                    writer.add_page(frame)
+            page_targets = {fmt: page_output_path(out_path, index) for fmt, out_path in targets.items() if fmt not in writers}
+            if page_targets:
+                save_targets(frame, filepath, page_targets, profile, page=index, timer=timer, variant=variant)
+            for fmt, page_path in page_targets.items():
+                outputs[fmt].append(page_path)
+    return [path for fmt in targets for path in outputs[fmt]]
+
+def image_backend(filepath, fmt):
+    ext = Path(filepath).suffix.lower()
+    decoder = 'cairosvg' if ext == '.svg' else 'pillow-heif' if ext in HEIF_EXTENSIONS else 'pillow'
+    encoders = sorted({'pillow-heif' if f == 'heic' else 'pillow' for f in job_formats(fmt)})
+    return decoder if encoders == [decoder] else f"{decoder}>{'+'.join(encoders)}"
+
+# GUI-free so it can be pickled into worker processes and shared by the CLI.
+# Returns {"status": "success" | "skipped", "outputs": [paths written]}; any
+# failure is raised back to the caller. Converted files also report "backend",
+# "seconds", per-stage "stages" timings (see report.STAGES), "bytes_in" and "bytes_out".
+# `options` holds optional per-batch settings (e.g. svg_dpi / svg_width / svg_height, pages, profile,
+# anim_fps / anim_width for GIF and animated WebP, 0 keeping the source rate/size; max_size, fit,
+# auto_rotate, colorspace, flatten and background for the image transforms in transforms.py;
+# stem to write under another name than the source's).
+# `progress` (video/audio only) is called with a 0..1 fraction as ffmpeg works.
+def convert_file(filepath, mode, fmt, out_dir, options=None, progress=None):
+    timer = StageTimer()
+    started = time.perf_counter()
+    result = _convert_file(filepath, mode, fmt, out_dir, options or {}, progress, timer)
+    if result["status"] == "success":
+        result.update(
+            seconds=time.perf_counter() - started,
+            stages=timer.timings,
+            bytes_in=os.path.getsize(filepath),
+            bytes_out=sum(os.path.getsize(path) for path in result["outputs"]),
+        )
+    return result
+
+def _convert_file(filepath, mode, fmt, out_dir, options, progress, timer):
+    ext = Path(filepath).suffix.lower()
+    targets = {f: output_path(filepath, f, out_dir, options.get('stem')) for f in job_formats(fmt)}
+    profile = options.get('profile') or profiles.DEFAULT_PROFILE
+    transform = transforms.settings(options)
+
+    # --- IMAGE MODE ---
+    if mode == "Image":
+        if ext not in VALID_INPUTS['image']: return {"status": "skipped", "outputs": []}
+
+        # Pillow only reads the header here; pixels are decoded on first use
+        with timer.stage('decode'):
+            img = open_source(filepath, fmt, options)
+        try:
+            pages = options.get('pages', 'first')
+            if pages == 'first' or getattr(img, 'n_frames', 1) == 1:
+                outputs = save_targets(transform_image(img, transform, timer), filepath, targets, profile, timer=timer, variant=transforms.key(transform))
+            else:
+                outputs = convert_pages(img, filepath, targets, pages, profile, timer, transform)
+        finally:
+            img.close()
+        return {"status": "success", "outputs": outputs, "backend": image_backend(filepath, fmt)}
+
+    # --- VIDEO MODE ---
+    # ffmpeg decodes, encodes and writes in one process, so the whole run counts as encode
+    elif mode == "Video":
+        if ext not in VALID_INPUTS['video']: return {"status": "skipped", "outputs": []}
+
+        # Native ffmpeg: remux when the streams already fit, re-encode otherwise;
+        # GIF / animated WebP go through the two-pass palette pipeline
+        fps = options.get('anim_fps', ffmpeg_backend.DEFAULT_ANIM_FPS)
+        width = options.get('anim_width', ffmpeg_backend.DEFAULT_ANIM_WIDTH)
+        native, animated = {}, {}
+        if ffmpeg_backend.available():
+            for f, path in targets.items():
+                (animated if f in ffmpeg_backend.ANIMATED_FORMATS else native)[f] = path
+        runs = [transcode_targets(filepath, native, mode, progress, profile, timer)] if native else []
+        if animated: runs.append(animate_targets(filepath, animated, progress, fps, width, profile, timer))
+        # One "ffmpeg:" prefix over both runs, e.g. "ffmpeg:libx264+aac,palettegen+gif"
+        if runs: backend = "ffmpeg:" + ",".join(run.removeprefix("ffmpeg:") for run in runs)
+
+        rest = {f: path for f, path in targets.items() if f not in native and f not in animated}
+        if rest:
+            # Only without ffmpeg, so every target lands here
+            VideoFileClip, _ = load_moviepy()
+            with timer.stage('decode'):
+                clip = VideoFileClip(filepath)
+            try:
+                for f, out_path in rest.items():
+                    with timer.stage('encode'), atomic_output(out_path) as target:
+                        if f in ffmpeg_backend.ANIMATED_FORMATS:
+                            if f != 'gif': raise ValueError("Animated WebP output requires ffmpeg")
+                            clip.write_gif(target, fps=fps or None, verbose=False, logger=None)
+                        else:
+                            codec = 'libvpx' if f == 'webm' else 'libx264'
+                            params = profiles.video_args(codec, profile) + profiles.audio_args('aac', profile)
+                            clip.write_videofile(target, codec=codec, audio_codec='aac', ffmpeg_params=params, verbose=False, logger=None)
+            finally:
+                clip.close()
+            backend = "moviepy"
+        return {"status": "success", "outputs": list(targets.values()), "backend": backend}
+
+    # --- AUDIO MODE ---
+    elif mode == "Audio":
+        if ext not in VALID_INPUTS['audio'] and ext not in VALID_INPUTS['video']: return {"status": "skipped", "outputs": []}
+
+        if ffmpeg_backend.available():
+            backend = transcode_targets(filepath, targets, mode, progress, profile, timer)
+            return {"status": "success", "outputs": list(targets.values()), "backend": backend}
+
+        _, AudioFileClip = load_moviepy()
+        with timer.stage('decode'):
+            clip = AudioFileClip(filepath)
+        try:
+            for f, out_path in targets.items():
+                params = profiles.audio_args(ffmpeg_backend.AUDIO_ENCODERS.get(f), profile)
+                with timer.stage('encode'), atomic_output(out_path) as target:
+                    clip.write_audiofile(target, ffmpeg_params=params, verbose=False, logger=None)
+        finally:
+            clip.close()
+        return {"status": "success", "outputs": list(targets.values()), "backend": "moviepy"}
+
+    return {"status": "skipped", "outputs": []}
+
+def transcode_targets(filepath, targets, mode, progress, profile, timer):
+    # One ffmpeg run writes every target format, each through its own temp file
+    with timer.stage('encode'), contextlib.ExitStack() as stack:
+        temps = {f: stack.enter_context(atomic_output(out_path)) for f, out_path in targets.items()}
+        return ffmpeg_backend.transcode_many(filepath, temps, mode, progress, profile=profile)
+
+def animate_targets(filepath, targets, progress, fps, width, profile, timer):
+    with timer.stage('encode'), contextlib.ExitStack() as stack:
+        temps = {f: stack.enter_context(atomic_output(out_path)) for f, out_path in targets.items()}
+        return ffmpeg_backend.animate(filepath, temps, progress, fps=fps, width=width, profile=profile)
+
+
+def is_image_job(job):
+    return job[1] == "Image"
+
+def warm_worker():
+    # Run once in every worker of a long-lived engine (see engine.warm_up), so
+    # the common Pillow plugins are imported before the first file arrives
+    Image.preinit()
+
+
+# --- Batch Runner ---
+# Shared by the GUI and CLI: answers what it can from the cache, runs the rest
+# on the engine, and stores fresh results. Yields (job, result, error) as they
+# finish; cache hits come back first with status "cached". The rest are started
+# in scheduler order (pinned paths first, then by estimated cost). Sources that are
+# byte-identical copies of another job's (see duplicates.py) are not converted
+# again: they get links to its outputs and come back with it, as "cached" with
+# backend "duplicate". With a journal, every finished job is recorded so an
+# interrupted batch can be resumed. With sync, outputs are fsynced in batches
+# (output.SyncBatch) and a job is only journaled once its files are on disk.
+
+def cache_settings(job):
+    # Everything about a job except where the source and output live and what
+    # the outputs are called (a hit is restored under this run's names)
+    _, mode, fmt, _, options = job
+    return [mode, fmt, {key: value for key, value in (options or {}).items() if key != 'stem'}]
+
+def run_batch(engine, jobs, cache=None, on_progress=None, journal=None, pinned=(), dedupe=True, sync=False):
+    syncer = SyncBatch(lambda item: journal.record(*item) if journal is not None else None) if sync else None
+    try:
+        yield from _run_batch(engine, jobs, cache, on_progress, journal, pinned, dedupe, syncer)
+    finally:
+        # Also on cancel: whatever finished is flushed (and journaled) before leaving
+        if syncer is not None: syncer.flush()
+
+def _run_batch(engine, jobs, cache, on_progress, journal, pinned, dedupe, syncer):
+    # Cache lookups (which may hash every source) and duplicate hashing run on a
+    # small thread pool while the engine works: a job is started as soon as it is
+    # known to need converting, so the first results do not wait for the whole
+    # batch to be hashed. Only jobs sharing a size (and settings) with another,
+    # which find() has to read, are held back until the lookups are done.
+    def record(job, result, error):
+        state = "error" if error is not None else result["status"]
+        if syncer is not None: syncer.add(result["outputs"] if error is None else [], (job, state))
+        elif journal is not None: journal.record(job, state)
+
+    def lookup(job):
+        try:
+            key = cache.key(job[0], cache_settings(job))
+            return key, cache.restore(key, job[3], duplicates.output_stem(job))
+        except OSError:
+            return None, None
+
+    def start(jobs):
+        for job in scheduler.plan(jobs, is_image_job, engine.workers, engine.media_workers, pinned):
+            running[engine.submit(convert_file, job, is_image_job, on_progress, n_image)] = job
+
+    jobs = list(jobs)
+    n_image = sum(1 for job in jobs if is_image_job(job))
+    held = duplicates.candidates(jobs) if dedupe and len(jobs) > 1 else set()
+    keys = {}
+    copies = {}       # path converted -> jobs that just get its outputs
+    waiting = []      # misses that might be duplicates
+    running = {}      # engine future -> job
+
+    pool = ThreadPoolExecutor(max_workers=duplicates.HASH_WORKERS)
+    try:
+        lookups = {pool.submit(lookup, job): job for job in jobs} if cache is not None else {}
+        if cache is None:
+            start([job for job in jobs if job[0] not in held])
+            waiting = [job for job in jobs if job[0] in held]
+        finding = None
+
+        while lookups or finding is not None or running or waiting:
+            if not lookups and finding is None and waiting:
+                finding = pool.submit(duplicates.find, waiting)
+            wait([*lookups, *running, *([finding] if finding else [])], return_when=FIRST_COMPLETED)
+
+            ready = []
+            for future in [f for f in lookups if f.done()]:
+                job = lookups.pop(future)
+                key, outputs = future.result()
+                if outputs:
+                    result = {"status": "cached", "outputs": outputs, "backend": "cache"}
+                    record(job, result, None)
+                    yield job, result, None
+                    continue
+                if key is not None: keys[job[0]] = key
+                (waiting if job[0] in held else ready).append(job)
+            if finding is not None and finding.done():
+                same = finding.result()
+                jobs_by_path = {job[0]: job for job in waiting}
+                for path, first in same.items():
+                    copies.setdefault(first, []).append(jobs_by_path[path])
+                ready.extend(job for job in waiting if job[0] not in same)
+                waiting, finding = [], None
+            if ready: start(ready)
+
+            for future in [f for f in running if f.done()]:
+                job = running.pop(future)
+                try:
+                    result, error = future.result(), None
+                except Exception as e:
+                    result, error = None, e
+                if error is None and result["status"] == "success" and job[0] in keys:
+                    try:
+                        cache.store(keys[job[0]], result["outputs"], duplicates.output_stem(job))
+                    except OSError:
+                        pass  # The cache is best effort; the conversion itself succeeded
+                record(job, result, error)
+                yield job, result, error
+
+                for copy in copies.pop(job[0], ()):
+                    copy_result, copy_error = result, error  # same bytes, same settings: same outcome
+                    if error is None and result["status"] == "success":
+                        try:
+                            outputs = duplicates.link_outputs(job, result["outputs"], copy)
+                            copy_result = {"status": "cached", "outputs": outputs, "backend": "duplicate"}
+                        except OSError as e:
+                            copy_result, copy_error = None, e
+                        # Cached under its own key too, so the next run of the batch finds it
+                        if copy_error is None and copy[0] in keys:
+                            try:
+                                cache.store(keys[copy[0]], outputs, duplicates.output_stem(copy))
+                            except OSError:
+                                pass
+                    record(copy, copy_result, copy_error)
+                    yield copy, copy_result, copy_error
+    finally:
+        # A cancelled batch does not wait for the lookups it no longer needs
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def resume_jobs(journal):
+    # Outstanding work of an interrupted batch, with its stale temp files cleared
+    for out_dir in {job[3] for job in journal.jobs}:
+        remove_partials(out_dir)
+    remove_stale_staging()
+    return journal.pending()
+
+
+# --- Merged Output ---
+# Appends every page of every job, in queue order, to a single PDF or TIFF.
+# Runs on the calling thread since pages have to land in order; each source is
+# opened, streamed into the writer page by page and closed before the next.
+# Yields (job, result, error) per source like run_batch.
+
+def merge_batch(jobs, out_path):
+    jobs = list(jobs)
+    if not jobs: return
+    fmt = jobs[0][2]
+    if fmt not in MULTIPAGE_FORMATS:
+        raise ValueError(f"Only {', '.join(f.upper() for f in MULTIPAGE_FORMATS)} files can be merged")
+
+    profile = (jobs[0][4] or {}).get('profile')
+    with atomic_output(out_path) as target, open_writer(target, fmt, profiles.image_options(fmt, profile)) as writer:
+        for job in jobs:
+            filepath, mode, _, _, options = job
+            if mode != "Image" or Path(filepath).suffix.lower() not in VALID_INPUTS['image']:
+                yield job, {"status": "skipped", "outputs": []}, None
+                continue
+            try:
+                img = open_source(filepath, fmt, options or {})
+                transform = transforms.settings(options or {})
+                try:
+                    for frame in ImageSequence.Iterator(img):
+                        if transform:
+                            frame.load()
+                            frame = transforms.apply(frame, transform)
+                        writer.add_page(frame)
+                finally:
+                    img.close()
+            except Exception as e:
+                yield job, None, e
+                continue
+            yield job, {"status": "success", "outputs": [out_path]}, None
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from cache import file_digest, link_or_copy
+
+# --- Duplicate Sources and Output Names ---
+# Jobs whose sources hold the same bytes and whose settings match produce the same
+# output, so only the first is converted and the others get links (or copies) of
+# its files under their own names. Finding them stays cheap on large libraries:
+#   - only files of the same byte size (and the same settings) can be duplicates
+#   - hard links to one inode are duplicates without reading anything
+#   - the rest are compared by a hash of their first HEAD_BYTES and, only where
+#     those match, by a hash of the whole file; hashing runs several files at once
+# Separately, jobs that would write the same name into one folder (photo.jpg and
+# photo.heic -> photo.png, or IMG_0001.JPG from two cameras) get a numbered stem,
+# "IMG_0001 (2)", handed out in path order so the same inputs always get the same
+# names. Names are compared case-insensitively, as the default macOS volume does.
+
+HEAD_BYTES = 64 * 1024
+HASH_WORKERS = 4
+
+
+def output_stem(job):
+    filepath, _, _, _, options = job
+    return (options or {}).get('stem') or Path(filepath).stem
+
+
+def numbered_stem(stem, number):
+    return f"{stem} ({number})"
+
+
+def resolve_names(jobs):
+    # -> jobs, with options["stem"] set on every job that would overwrite another's output
+    jobs = list(jobs)
+    by_name = defaultdict(list)
+    for i, job in enumerate(jobs):
+        by_name[(os.path.normcase(os.path.abspath(job[3])), output_stem(job).lower())].append(i)
+
+    taken = set(by_name)
+    for (out_dir, _), indexes in by_name.items():
+        if len(indexes) < 2: continue
+        indexes.sort(key=lambda i: jobs[i][0])
+        number = 1
+        for i in indexes[1:]:
+            stem = output_stem(jobs[i])
+            number += 1
+            while (out_dir, numbered_stem(stem, number).lower()) in taken:
+                number += 1
+            taken.add((out_dir, numbered_stem(stem, number).lower()))
+            filepath, mode, fmt, job_dir, options = jobs[i]
+            jobs[i] = (filepath, mode, fmt, job_dir, {**(options or {}), 'stem': numbered_stem(stem, number)})
+    return jobs
+
+
+def settings_key(job):
+    # What decides the output besides the source bytes: not the paths or the name
+    _, mode, fmt, _, options = job
+    options = {key: value for key, value in (options or {}).items() if key != 'stem'}
+    return json.dumps([mode, fmt, options], sort_keys=True)
+
+
+def head_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.blake2b(f.read(HEAD_BYTES), digest_size=16).digest()
+
+
+def _readable(fn):
+    def digest(path):
+        try:
+            return fn(path)
+        except OSError:
+            return None  # Unreadable: never a duplicate; the conversion reports the error
+    return digest
+
+
+def _refine(pool, clusters, fn):
+    # Split every cluster by fn(path), dropping whatever is left on its own
+    paths = [path for cluster in clusters for path in cluster]
+    keys = dict(zip(paths, pool.map(_readable(fn), paths)))
+    refined = []
+    for cluster in clusters:
+        split = defaultdict(list)
+        for path in cluster:
+            if keys[path] is not None: split[keys[path]].append(path)
+        refined.extend(group for group in split.values() if len(group) > 1)
+    return refined
+
+
+def _size_groups(jobs):
+    # -> {(settings, size): [(path, inode), ...]}: only jobs in one group can match
+    groups = defaultdict(list)
+    for job in jobs:
+        try:
+            st = os.stat(job[0])
+        except OSError:
+            continue
+        groups[(settings_key(job), st.st_size)].append((job[0], (st.st_dev, st.st_ino)))
+    return groups
+
+
+def candidates(jobs):
+    # -> paths that might duplicate another job's source (one stat each, no reading);
+    # every other job can be converted without waiting for find()
+    return {path for group in _size_groups(jobs).values() if len(group) > 1 for path, _ in group}
+
+
+def find(jobs, workers=HASH_WORKERS):
+    # -> {path: path of the earliest job converting the same bytes with the same settings}
+    groups = _size_groups(jobs)
+
+    same = {}       # path -> earlier path it is a duplicate of
+    clusters = []
+    for group in groups.values():
+        if len(group) < 2: continue
+        first_of_inode = {}
+        cluster = []
+        for path, inode in group:
+            if inode in first_of_inode:
+                same[path] = first_of_inode[inode]
+            else:
+                first_of_inode[inode] = path
+                cluster.append(path)
+        if len(cluster) > 1: clusters.append(cluster)
+
+    if clusters:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            clusters = _refine(pool, clusters, head_digest)
+            clusters = _refine(pool, clusters, file_digest)
+        for cluster in clusters:
+            for path in cluster[1:]:
+                same[path] = cluster[0]
+
+    # Hard links of a file that itself turned out to be a duplicate point at the first copy
+    return {path: same.get(first, first) for path, first in same.items()}
+
+
+def link_outputs(job, outputs, duplicate):
+    # -> outputs of `duplicate`, linked from those `job` wrote (same names, its own stem and folder)
+    stem, new_stem = output_stem(job), output_stem(duplicate)
+    linked = []
+    for path in outputs:
+        name = os.path.basename(path)
+        target = os.path.join(duplicate[3], new_stem + name[len(stem):] if name.startswith(stem) else name)
+        if os.path.abspath(target) != os.path.abspath(path):
+            link_or_copy(path, target)
+        linked.append(target)
+    return linked
@@ -0,0 +1,94 @@
+import os
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Pillow work is CPU bound and holds the GIL for most filters, so image jobs go to
+# a process pool. ffmpeg/moviepy already run the heavy lifting in a child ffmpeg
+# process, so a small thread pool is enough to keep a few encodes in flight.
+DEFAULT_MEDIA_WORKERS = 2
+
+
+def default_workers():
+    return max(1, os.cpu_count() or 1)
+
+
+class ConversionEngine:
+    def __init__(self, workers=None, media_workers=None, image_executor=None, media_executor=None):
+        self.workers = max(1, int(workers or default_workers()))
+        self.media_workers = max(1, int(media_workers or min(DEFAULT_MEDIA_WORKERS, self.workers)))
+
+        # Executors can be injected (e.g. a ThreadPoolExecutor when debugging);
+        # anything created here is also shut down here.
+        self._image_executor = image_executor
+        self._media_executor = media_executor
+        self._owned = []
+
+    def _image_pool(self, njobs):
+        if self._image_executor is None:
+            if self.workers == 1 or njobs == 1:
+                # Not worth spawning interpreters for a single job
+                self._image_executor = ThreadPoolExecutor(max_workers=1)
+            else:
+                ctx = multiprocessing.get_context("spawn")
+                self._image_executor = ProcessPoolExecutor(max_workers=min(self.workers, njobs), mp_context=ctx)
+            self._owned.append(self._image_executor)
+        return self._image_executor
+
+    def _media_pool(self):
+        if self._media_executor is None:
+            self._media_executor = ThreadPoolExecutor(max_workers=self.media_workers)
+            self._owned.append(self._media_executor)
+        return self._media_executor
+
+    def warm_up(self, fn=None):
+        # For long-running callers (the folder watcher): start every image worker
+        # now, at full size, so the first files do not pay for interpreter start-up
+        # and imports, and the pool is not sized for whatever the first batch was
+        pool = self._image_pool(self.workers)
+        if fn is not None: wait([pool.submit(fn) for _ in range(self.workers)])
+
+    def submit(self, fn, job, is_image, on_progress=None, njobs=None):
+        # One job at a time, for callers that keep feeding work in (see run() for batches);
+        # njobs: image jobs expected in all, so a lone one does not spawn a process pool
+        return self._submit(self._image_pool(njobs or self.workers) if is_image(job) else None, fn, job, on_progress)
+
+    def _submit(self, image_pool, fn, job, on_progress):
+        if image_pool is not None: return image_pool.submit(fn, *job)
+        if on_progress is not None: return self._media_pool().submit(fn, *job, progress=functools.partial(on_progress, job))
+        return self._media_pool().submit(fn, *job)
+
+    def run(self, fn, jobs, is_image, on_progress=None):
+        """Submit fn(*job) for every job and yield (job, result, error) as each finishes.
+
+        Results come back in completion order, not submission order. Media jobs run
+        in this process, so they also get progress=partial(on_progress, job) when given.
+        """
+        jobs = list(jobs)
+        n_image = sum(1 for job in jobs if is_image(job))
+
+        pending = {}
+        for job in jobs:
+            pending[self._submit(self._image_pool(n_image) if is_image(job) else None, fn, job, on_progress)] = job
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                job = pending.pop(fut)
+                try:
+                    yield job, fut.result(), None
+                except Exception as e:
+                    yield job, None, e
+
+    def shutdown(self, cancel=False):
+        for pool in self._owned:
+            pool.shutdown(wait=not cancel, cancel_futures=cancel)
+        self._owned = []
+        self._image_executor = None
+        self._media_executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown(cancel=exc[0] is not None)
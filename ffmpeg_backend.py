@@ -0,0 +1,318 @@
+import functools
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+
+import profiles
+
+# --- Native ffmpeg Backend ---
+# Drives ffmpeg directly instead of decoding every frame into numpy via moviepy.
+# Streams whose codec the target container already accepts are remuxed with
+# "-c copy" (seconds instead of minutes); the rest are re-encoded. Progress is
+# read from "-progress pipe:1" and reported as a 0..1 fraction.
+
+# Codecs each target container can carry as-is (ffprobe codec names)
+COPY_COMPATIBLE = {
+    "mp4":  {"video": {"h264", "hevc", "mpeg4", "av1"}, "audio": {"aac", "mp3", "alac", "ac3", "opus"}},
+    "mov":  {"video": {"h264", "hevc", "mpeg4", "prores", "mjpeg"}, "audio": {"aac", "mp3", "alac", "ac3", "pcm_s16le", "pcm_s16be"}},
+    "mkv":  {"video": None, "audio": None},  # Matroska takes almost anything
+    "webm": {"video": {"vp8", "vp9", "av1"}, "audio": {"vorbis", "opus"}},
+    "avi":  {"video": {"mpeg4", "h264", "mjpeg", "msmpeg4v2", "msmpeg4v3"}, "audio": {"mp3", "ac3", "pcm_s16le"}},
+    "flv":  {"video": {"h264", "flv1"}, "audio": {"aac", "mp3"}},
+    "wmv":  {"video": {"wmv1", "wmv2", "wmv3", "vc1"}, "audio": {"wmav1", "wmav2"}},
+    "mpeg": {"video": {"mpeg1video", "mpeg2video"}, "audio": {"mp2", "mp3", "ac3"}},
+    "mp3":  {"audio": {"mp3"}},
+    "aac":  {"audio": {"aac"}},
+    "m4a":  {"audio": {"aac", "alac"}},
+    "flac": {"audio": {"flac"}},
+    "wav":  {"audio": {"pcm_s16le", "pcm_s24le", "pcm_f32le"}},
+    "ogg":  {"audio": {"vorbis", "opus", "flac"}},
+    "wma":  {"audio": {"wmav1", "wmav2"}},
+    "aiff": {"audio": {"pcm_s16be", "pcm_s24be"}},
+}
+
+# Encoders used when a stream has to be re-encoded (matches the old moviepy defaults
+# where those were valid for the container)
+VIDEO_ENCODERS = {
+    "webm": ("libvpx", "libvorbis"),
+    "avi":  ("libx264", "libmp3lame"),
+    "wmv":  ("wmv2", "wmav2"),
+    "mpeg": ("mpeg2video", "mp2"),
+}
+DEFAULT_VIDEO_ENCODERS = ("libx264", "aac")
+
+AUDIO_ENCODERS = {
+    "mp3": "libmp3lame", "aac": "aac", "m4a": "aac", "flac": "flac", "wav": "pcm_s16le",
+    "ogg": "libvorbis", "wma": "wmav2", "aiff": "pcm_s16be",
+}
+
+# Containers that need Annex B H.264/HEVC when copying out of MP4/MKV
+ANNEXB_FILTERS = {"h264": "h264_mp4toannexb", "hevc": "hevc_mp4toannexb"}
+ANNEXB_CONTAINERS = {"avi"}
+
+# Muxer names where ffmpeg would not guess them from the extension
+MUXERS = {"mkv": "matroska", "aac": "adts", "m4a": "ipod", "wmv": "asf", "wma": "asf", "mpeg": "mpeg"}
+
+
+class FFmpegError(RuntimeError):
+    pass
+
+
+@functools.cache
+def find_ffmpeg():
+    path = shutil.which("ffmpeg")
+    if path: return path
+    try:
+        # moviepy ships its own binary through imageio-ffmpeg
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return None
+
+
+@functools.cache
+def find_ffprobe():
+    ffmpeg = find_ffmpeg()
+    if ffmpeg:
+        sibling = os.path.join(os.path.dirname(ffmpeg), "ffprobe")
+        if os.path.exists(sibling): return sibling
+    return shutil.which("ffprobe")
+
+
+def available():
+    return find_ffmpeg() is not None
+
+
+# --- Probing ---
+
+def probe(path):
+    # -> {"duration": seconds or None, "video": [codec, ...], "audio": [codec, ...], "width", "height"}
+    # Cached per file version: the scheduler probes media jobs up front and the
+    # conversion then reuses the answer instead of starting ffmpeg twice
+    st = os.stat(path)
+    return dict(_probe(path, st.st_size, st.st_mtime_ns))
+
+
+@functools.lru_cache(maxsize=1024)
+def _probe(path, size, mtime_ns):
+    ffprobe = find_ffprobe()
+    if ffprobe:
+        proc = subprocess.run(
+            [ffprobe, "-v", "error", "-show_entries", "format=duration:stream=codec_type,codec_name,width,height",
+             "-of", "json", path],
+            capture_output=True, text=True,
+        )
+        if proc.returncode == 0:
+            return _parse_ffprobe(json.loads(proc.stdout or "{}"))
+
+    # No ffprobe (e.g. the imageio-ffmpeg binary): read the banner from "ffmpeg -i"
+    proc = subprocess.run([find_ffmpeg(), "-hide_banner", "-nostdin", "-i", path], capture_output=True, text=True, errors="replace")
+    return _parse_banner(proc.stderr)
+
+
+def _parse_ffprobe(data):
+    info = {"duration": None, "video": [], "audio": [], "width": None, "height": None}
+    try:
+        info["duration"] = float(data.get("format", {}).get("duration"))
+    except (TypeError, ValueError):
+        pass
+    for stream in data.get("streams", []):
+        kind = stream.get("codec_type")
+        if kind in ("video", "audio"):
+            info[kind].append(stream.get("codec_name"))
+            if kind == "video" and info["width"] is None:
+                info["width"], info["height"] = stream.get("width"), stream.get("height")
+    return info
+
+
+_DURATION = re.compile(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)")
+_STREAM = re.compile(r"Stream #\d+:\d+.*?: (Video|Audio): (\w+)(.*)")
+_SIZE = re.compile(r"\b(\d{2,5})x(\d{2,5})\b")
+
+
+def _parse_banner(text):
+    info = {"duration": None, "video": [], "audio": [], "width": None, "height": None}
+    match = _DURATION.search(text)
+    if match:
+        h, m, s = match.groups()
+        info["duration"] = int(h) * 3600 + int(m) * 60 + float(s)
+    for kind, codec, rest in _STREAM.findall(text):
+        info[kind.lower()].append(codec)
+        if kind == "Video" and info["width"] is None:
+            size = _SIZE.search(rest)
+            if size: info["width"], info["height"] = int(size.group(1)), int(size.group(2))
+    return info
+
+
+def can_copy(codec, fmt, kind):
+    allowed = COPY_COMPATIBLE.get(fmt, {}).get(kind, set())
+    return allowed is None or codec in allowed
+
+
+# --- Transcoding ---
+
+def output_args(out_path, fmt, mode, info, profile=profiles.DEFAULT_PROFILE):
+    # Stream selection, codecs and muxer for one output file
+    args = []
+    if mode == "Video":
+        vcodec, acodec = VIDEO_ENCODERS.get(fmt, DEFAULT_VIDEO_ENCODERS)
+        args += ["-map", "0:v:0", "-map", "0:a:0?"]
+        video = info["video"][0] if info["video"] else None
+        if video and can_copy(video, fmt, "video"):
+            args += ["-c:v", "copy"]
+            if fmt in ANNEXB_CONTAINERS and video in ANNEXB_FILTERS:
+                args += ["-bsf:v", ANNEXB_FILTERS[video]]
+        else:
+            args += ["-c:v", vcodec] + profiles.video_args(vcodec, profile)
+            # Keep x264 output playable in QuickTime and browsers
+            if vcodec == "libx264": args += ["-pix_fmt", "yuv420p"]
+        if info["audio"]:
+            if can_copy(info["audio"][0], fmt, "audio"):
+                args += ["-c:a", "copy"]
+            else:
+                args += ["-c:a", acodec] + profiles.audio_args(acodec, profile)
+    else:
+        audio = info["audio"][0] if info["audio"] else None
+        if audio is None: raise FFmpegError("no audio stream found")
+        args += ["-vn", "-map", "0:a:0"]
+        if can_copy(audio, fmt, "audio"):
+            args += ["-c:a", "copy"]
+        else:
+            args += ["-c:a", AUDIO_ENCODERS[fmt]] + profiles.audio_args(AUDIO_ENCODERS[fmt], profile)
+
+    if fmt in MUXERS: args += ["-f", MUXERS[fmt]]
+    return args + [out_path]
+
+
+def build_command(src, targets, mode, info, profile=profiles.DEFAULT_PROFILE):
+    # targets: {fmt: out_path}. One input, any number of outputs: ffmpeg demuxes
+    # and decodes each source stream once and feeds every encoder from it.
+    cmd = [find_ffmpeg(), "-hide_banner", "-nostdin", "-y", "-v", "error", "-i", src, "-progress", "pipe:1", "-nostats"]
+    for fmt, out_path in targets.items():
+        cmd += output_args(out_path, fmt, mode, info, profile)
+    return cmd
+
+
+def codecs_used(args):
+    # e.g. "copy+copy" for a remux, "libx264+aac" for a full encode
+    return "+".join(args[i + 1] for i, arg in enumerate(args) if arg in ("-c:v", "-c:a"))
+
+
+def run_ffmpeg(cmd, duration=None, progress=None):
+    # Runs an ffmpeg command that has "-progress pipe:1", reporting 0..1 as it goes
+    # stderr goes to a temp file so a chatty ffmpeg can never block on a full pipe
+    with tempfile.TemporaryFile() as err:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=err, text=True)
+        try:
+            for line in proc.stdout:
+                key, _, value = line.strip().partition("=")
+                # out_time_us (and the misnamed out_time_ms) are both microseconds
+                if progress and duration and key == "out_time_us" and value.isdigit():
+                    progress(min(1.0, int(value) / 1e6 / duration))
+        except BaseException:
+            # A failing progress callback (or a cancel) must not leave ffmpeg running
+            proc.kill()
+            proc.wait()
+            raise
+        finally:
+            proc.stdout.close()
+        proc.wait()
+        if proc.returncode != 0:
+            err.seek(0)
+            message = err.read().decode(errors="replace").strip().splitlines()
+            raise FFmpegError(message[-1] if message else f"ffmpeg exited with status {proc.returncode}")
+
+
+def transcode(src, out_path, fmt, mode, progress=None, info=None, profile=profiles.DEFAULT_PROFILE):
+    return transcode_many(src, {fmt: out_path}, mode, progress, info, profile)
+
+
+def transcode_many(src, targets, mode, progress=None, info=None, profile=profiles.DEFAULT_PROFILE):
+    info = info or probe(src)
+    run_ffmpeg(build_command(src, targets, mode, info, profile), info.get("duration"), progress)
+    if progress: progress(1.0)
+    # e.g. "ffmpeg:libx264+aac" for one output, "ffmpeg:libx264+aac,libvpx+libvorbis" for two
+    return "ffmpeg:" + ",".join(codecs_used(output_args(path, fmt, mode, info, profile)) for fmt, path in targets.items())
+
+
+# --- Animated Output (GIF / WebP) ---
+# GIF allows 256 colours. Quantizing every frame on its own (moviepy's writer) is
+# slow, flickers and compresses badly. Instead, a first pass runs palettegen over
+# the whole clip at the output size and rate, and a second pass maps every frame
+# onto that one palette (paletteuse) while encoding. Animated WebP needs no
+# palette and is written by the same second pass. Frames stream through ffmpeg in
+# both passes, so memory does not grow with the clip length.
+ANIMATED_FORMATS = ("gif", "webp")
+DEFAULT_ANIM_FPS = 15
+DEFAULT_ANIM_WIDTH = 640     # never upscaled; 0 keeps the source size (and fps 0 the rate)
+PALETTE_SHARE = 0.25         # of the progress bar spent on the palette pass
+
+
+def animation_filter(fps, width):
+    steps = []
+    if fps: steps.append(f"fps={fps:g}")
+    if width: steps.append(f"scale=w='min({int(width)},iw)':h=-1:flags=lanczos")
+    return ",".join(steps) or "null"
+
+
+def animate(src, targets, progress=None, info=None, fps=DEFAULT_ANIM_FPS, width=DEFAULT_ANIM_WIDTH, profile=profiles.DEFAULT_PROFILE):
+    # targets: {"gif" / "webp": out_path}
+    info = info or probe(src)
+    if not info["video"]: raise FFmpegError("no video stream found")
+    duration = info.get("duration")
+    frames = animation_filter(fps, width)
+    ffmpeg = [find_ffmpeg(), "-hide_banner", "-nostdin", "-y", "-v", "error"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cmd = ffmpeg + ["-i", src]
+        if "gif" in targets:
+            palette = os.path.join(tmp, "palette.png")
+            report = progress and (lambda fraction: progress(fraction * PALETTE_SHARE))
+            run_ffmpeg(ffmpeg + ["-i", src, "-an", "-vf", f"{frames},palettegen", "-progress", "pipe:1", "-nostats", palette], duration, report)
+            cmd += ["-i", palette]
+            report = progress and (lambda fraction: progress(PALETTE_SHARE + fraction * (1 - PALETTE_SHARE)))
+        else:
+            report = progress
+
+        # Resample and scale once, then split the frames between the outputs
+        labels = [f"[v{i}]" for i in range(len(targets))]
+        graph = [f"[0:v:0]{frames}" + (f",split={len(labels)}" if len(labels) > 1 else "") + "".join(labels)]
+        outputs = []
+        for label, (fmt, out_path) in zip(labels, targets.items()):
+            if fmt == "gif":
+                # diff_mode=rectangle only re-dithers what changed: smaller, steadier GIFs of screen recordings
+                graph.append(f"{label}[1:v]paletteuse=dither={profiles.gif_dither(profile)}:diff_mode=rectangle[gif]")
+                outputs += ["-map", "[gif]", "-loop", "0", "-f", "gif", out_path]
+            else:
+                outputs += ["-map", label, "-c:v", "libwebp_anim"] + profiles.video_args("libwebp_anim", profile)
+                outputs += ["-loop", "0", "-f", "webp", out_path]
+        run_ffmpeg(cmd + ["-filter_complex", ";".join(graph), "-progress", "pipe:1", "-nostats"] + outputs, duration, report)
+
+    if progress: progress(1.0)
+    return "ffmpeg:" + ",".join("palettegen+gif" if fmt == "gif" else "libwebp_anim" for fmt in targets)
+
+
+# --- Frame Grab ---
+
+def grab_frame(src, max_size, info=None):
+    # -> PNG bytes of one frame scaled to fit max_size (for previews), or None when
+    # there is no picture at all. Audio files yield their cover art, if any.
+    info = info or probe(src)
+    if not info["video"]: return None
+    # A tenth of the way in skips fade-ins and black leaders; -ss before -i seeks
+    # by keyframe instead of decoding everything up to that point
+    at = (info["duration"] or 0) / 10
+    cmd = [
+        find_ffmpeg(), "-hide_banner", "-nostdin", "-loglevel", "error", "-ss", f"{at:.3f}", "-i", src,
+        "-map", "0:v:0", "-frames:v", "1",
+        "-vf", f"scale={max_size}:{max_size}:force_original_aspect_ratio=decrease",
+        "-f", "image2pipe", "-c:v", "png", "pipe:1",
+    ]
+    proc = subprocess.run(cmd, capture_output=True)
+    if proc.returncode != 0 or not proc.stdout:
+        message = proc.stderr.decode(errors="replace").strip().splitlines()
+        raise FFmpegError(message[-1] if message else f"ffmpeg exited with status {proc.returncode}")
+    return proc.stdout
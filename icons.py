@@ -0,0 +1,72 @@
+import os
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+# --- Icon Pipeline ---
+# ICNS and ICO files hold the same artwork at many sizes. The pyramid is built
+# once per source: the largest level is made from the decoded image, and every
+# smaller level from the level twice its size (or the next one up), so each
+# LANCZOS pass only touches a few thousand pixels instead of the whole source.
+# Recent pyramids are kept per process, so ICNS + ICO from one source share it.
+
+ICNS_SIZES = (1024, 512, 256, 128, 64, 32, 16)   # covers 16..512 @1x and @2x
+ICO_SIZES = (256, 128, 64, 48, 32, 24, 16)
+PYRAMID_SIZES = tuple(sorted(set(ICNS_SIZES + ICO_SIZES), reverse=True))
+
+PYRAMID_CACHE_SIZE = 8  # a 1024px pyramid is ~5.5MB of RGBA
+
+_pyramids = OrderedDict()
+_lock = threading.Lock()
+
+
+def build_pyramid(base):
+    # base: square RGBA image; its width is the top level
+    levels = {base.width: base}
+    previous = base
+    for size in PYRAMID_SIZES:
+        if size >= base.width: continue
+        source = levels.get(size * 2, previous)
+        previous = source.resize((size, size), Image.Resampling.LANCZOS)
+        levels[size] = previous
+    return levels
+
+
+def _source_key(filepath, page, variant=None):
+    st = os.stat(filepath)
+    return (os.path.abspath(filepath), st.st_size, st.st_mtime_ns, page, variant)
+
+
+def get_pyramid(filepath, top, make_base, page=1, variant=None):
+    # make_base(size) must return a square RGBA image of that size; it is only
+    # called when no cached pyramid for this source (page, transforms) reaches `top`
+    key = _source_key(filepath, page, variant)
+    with _lock:
+        levels = _pyramids.get(key)
+        if levels is not None and max(levels) >= top:
+            _pyramids.move_to_end(key)
+            return levels
+
+    levels = build_pyramid(make_base(top))
+    with _lock:
+        _pyramids[key] = levels
+        _pyramids.move_to_end(key)
+        while len(_pyramids) > PYRAMID_CACHE_SIZE:
+            _pyramids.popitem(last=False)
+    return levels
+
+
+def save_icns(levels, out_path):
+    top = levels[ICNS_SIZES[0]]
+    top.save(out_path, format='ICNS', append_images=[levels[s] for s in ICNS_SIZES[1:]])
+
+
+def save_ico(levels, out_path, top=ICO_SIZES[0]):
+    sizes = [s for s in ICO_SIZES if s <= top]
+    levels[sizes[0]].save(
+        out_path,
+        format='ICO',
+        sizes=[(s, s) for s in sizes],
+        append_images=[levels[s] for s in sizes[1:]]
+    )
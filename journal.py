@@ -0,0 +1,149 @@
+import glob
+import json
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, so a running batch cannot be told apart
+    fcntl = None
+
+from cache import default_cache_dir
+
+# --- Batch Journal ---
+# Append-only record of a running batch, one JSON object per line:
+#   {"batch": id, "created": t, "jobs": [[path, mode, fmt, out_dir, options], ...]}
+#   {"path": ..., "state": "success" | "cached" | "skipped" | "error"}
+# Each line is flushed as soon as its file finishes, so if the app is closed or
+# crashes the journal still says exactly what is left. A torn last line from a
+# crash is ignored. The file is removed once the batch runs to the end; anything
+# still in the journal directory is an interrupted batch that can be resumed,
+# unless it is flock()ed: the process running (or resuming) a batch holds a lock
+# on its journal until it is done, so another one never picks it up mid-run.
+# Jobs that ended in "error" are retried on resume.
+
+DONE_STATES = ("success", "cached", "skipped")
+
+
+def default_journal_dir():
+    return os.path.join(default_cache_dir(), "journals")
+
+
+class BatchJournal:
+    def __init__(self, path, jobs, done=()):
+        self.path = path
+        self.batch_id = os.path.splitext(os.path.basename(path))[0]
+        self.jobs = jobs
+        self.done = set(done)
+        self._file = None
+
+    @classmethod
+    def create(cls, jobs, root=None):
+        root = root or default_journal_dir()
+        os.makedirs(root, exist_ok=True)
+        batch_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        path = os.path.join(root, f"{batch_id}.jsonl")
+        # Written under a hidden name and renamed once locked, so it is never seen unlocked
+        hidden = os.path.join(root, f".{batch_id}.jsonl")
+        journal = cls(path, [tuple(job) for job in jobs])
+        journal._file = _locked(hidden, create=True)
+        journal._append({"batch": journal.batch_id, "created": time.time(), "jobs": journal.jobs})
+        os.replace(hidden, path)
+        return journal
+
+    @classmethod
+    def load(cls, path, lock=False):
+        # lock: claim the batch (BlockingIOError if another process has it) before
+        # reading it, so nothing can be recorded in between
+        jobs, done = None, set()
+        claim = _locked(path) if lock else None
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn write from a crash
+                    if "jobs" in record:
+                        jobs = [tuple(job) for job in record["jobs"]]
+                    elif record.get("state") in DONE_STATES:
+                        done.add(record["path"])
+                    else:
+                        done.discard(record.get("path"))
+            if jobs is None: raise ValueError(f"{path} is not a batch journal")
+        except BaseException:
+            if claim is not None: claim.close()
+            raise
+        journal = cls(path, jobs, done)
+        journal._file = claim
+        return journal
+
+    def _append(self, record):
+        if self._file is None: self._file = _locked(self.path, create=True)
+        self._file.write(json.dumps(record) + "\n")
+        # Flushed to the OS right away: survives the app dying, which is what resume is for
+        self._file.flush()
+
+    def record(self, job, state):
+        if state in DONE_STATES: self.done.add(job[0])
+        self._append({"path": job[0], "state": state})
+
+    def pending(self):
+        return [job for job in self.jobs if job[0] not in self.done]
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def finish(self):
+        # The batch ran to the end: nothing left to resume
+        self.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def _locked(path, create=False):
+    # -> journal opened for appending, holding its lock
+    flags = os.O_WRONLY | os.O_APPEND | (os.O_CREAT if create else 0)
+    f = os.fdopen(os.open(path, flags, 0o644), "a", encoding="utf-8")
+    if fcntl is None: return f
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BaseException:
+        f.close()
+        raise
+    return f
+
+
+def is_running(path):
+    # A live process holds the journal's lock
+    if fcntl is None: return False
+    try:
+        with open(path, "rb") as f:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return True
+    except OSError:
+        return False
+    return False
+
+
+def unfinished(root=None):
+    # Interrupted batches, newest first
+    paths = [path for path in glob.glob(os.path.join(root or default_journal_dir(), "*.jsonl")) if not is_running(path)]
+    return sorted(paths, key=os.path.getmtime, reverse=True)
+
+
+def find(batch_id=None, root=None):
+    # -> BatchJournal for batch_id (or the newest interrupted batch), or None. The
+    # journal comes back locked: close() or finish() it once the batch is over.
+    for path in unfinished(root):
+        if batch_id is None or os.path.basename(path) == f"{batch_id}.jsonl":
+            try:
+                return BatchJournal.load(path, lock=True)
+            except (BlockingIOError, FileNotFoundError):
+                continue  # another process resumed (or finished) it in the meantime
+    return None
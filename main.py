@@ -1,6 +1,9 @@
-def main():
-    print("Hello from mac-image-converter!")
+import multiprocessing
+import sys
+
+from cli import main
 
 
 if __name__ == "__main__":
-    main()
+    multiprocessing.freeze_support()
+    sys.exit(main())
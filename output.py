@@ -0,0 +1,204 @@
+import contextlib
+import functools
+import itertools
+import os
+import shutil
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, so no cross-process write slots
+    fcntl = None
+
+from cache import default_cache_dir
+
+# --- Output Layer ---
+# Every conversion result reaches the disk through here:
+#   - writers get a hidden temp name and the result is renamed into place once
+#     complete, so a crash or cancel never leaves a truncated file under the real
+#     name, and a hard-linked cache copy is never written through
+#   - outputs on another volume than the local cache folder (USB disks, SMB/NFS
+#     shares) are written to <cache>/staging first and copied over in one
+#     sequential pass, instead of ffmpeg, TIFF and SVG writers seeking and writing
+#     in small pieces over the slow link; images are encoded into memory anyway
+#   - at most WRITE_SLOTS files go to one device at a time, across every worker
+#     process (slots are flock()ed files), so parallel jobs queue for a slow disk
+#     instead of interleaving their writes and making it seek
+#   - with sync on, outputs are not fsynced one by one inside the workers: the
+#     batch runner flushes them together (see SyncBatch)
+PARTIAL_MARKER = ".partial-"
+WRITE_SLOTS = 2
+SLOT_POLL_MIN = 0.001  # seconds between tries for a busy device, doubling up to
+SLOT_POLL_MAX = 0.05   # SLOT_POLL_MAX (short next to writing a file to a slow disk)
+SYNC_BATCH = 64        # outputs per round of fsyncs
+SYNC_INTERVAL = 2.0    # seconds; long jobs still get flushed (and journaled) promptly
+
+_staged = itertools.count()
+
+
+def partial_path(out_path):
+    folder, name = os.path.split(out_path)
+    stem, ext = os.path.splitext(name)
+    # Keep the extension: Pillow and ffmpeg pick the format from it
+    return os.path.join(folder, f".{stem}{PARTIAL_MARKER}{os.getpid()}-{threading.get_ident()}{ext}")
+
+
+@functools.cache
+def staging_dir():
+    folder = os.path.join(default_cache_dir(), "staging")
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def device(path):
+    # Device of the folder path lives (or will live) in
+    return os.stat(os.path.dirname(os.path.abspath(path))).st_dev
+
+
+def is_local(out_path):
+    return device(out_path) == os.stat(staging_dir()).st_dev
+
+
+@contextlib.contextmanager
+def write_slot(path):
+    # Holds one of the WRITE_SLOTS slots of path's device while writing to it
+    if fcntl is None:
+        yield
+        return
+    locks = [os.path.join(staging_dir(), f".write-{device(path)}-{slot}.lock") for slot in range(WRITE_SLOTS)]
+    # Every slot is busy: poll them all again, so whichever frees up first is
+    # taken (blocking on one of them would leave the others idle)
+    delay = SLOT_POLL_MIN
+    while (fd := _take_slot(locks)) is None:
+        time.sleep(delay)
+        delay = min(delay * 2, SLOT_POLL_MAX)
+    try:
+        yield
+    finally:
+        os.close(fd)  # releases the lock
+
+
+def _take_slot(locks):
+    # -> fd holding the first free lock, or None
+    for lock in locks:
+        fd = os.open(lock, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return fd
+        except BlockingIOError:
+            os.close(fd)
+    return None
+
+
+def write_buffer(out_path, data):
+    # One encoded file from memory, in a single write
+    with write_slot(out_path), open(out_path, 'wb') as f:
+        f.write(data)
+
+
+@contextlib.contextmanager
+def atomic_output(out_path, staged=True):
+    # -> temp path to write out_path's contents to; renamed into place on success.
+    # staged=False when the caller writes one buffer with write_buffer: there is
+    # nothing to gain from a local copy first.
+    tmp = partial_path(out_path)
+    if staged and not is_local(out_path):
+        stage = os.path.join(staging_dir(), f"{next(_staged)}{os.path.basename(tmp)}")
+        try:
+            yield stage
+            with write_slot(out_path):
+                shutil.copyfile(stage, tmp)
+            os.replace(tmp, out_path)
+        except BaseException:
+            for path in (stage, tmp):
+                if os.path.exists(path): os.unlink(path)
+            raise
+        os.unlink(stage)
+        return
+
+    try:
+        yield tmp
+        os.replace(tmp, out_path)
+    except BaseException:
+        if os.path.exists(tmp): os.unlink(tmp)
+        raise
+
+
+def remove_partials(out_dir):
+    # Temp files a killed run left behind; one scandir per folder, however many jobs
+    try:
+        entries = list(os.scandir(out_dir))
+    except OSError:
+        return
+    for entry in entries:
+        if entry.name.startswith('.') and PARTIAL_MARKER in entry.name:
+            try:
+                os.unlink(entry.path)
+            except OSError:
+                pass
+
+
+def remove_stale_staging():
+    # Staged files whose process is gone (lock files are kept: they are reused)
+    for entry in os.scandir(staging_dir()):
+        if PARTIAL_MARKER not in entry.name: continue
+        pid = entry.name.split(PARTIAL_MARKER, 1)[1].split('-', 1)[0]
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            with contextlib.suppress(OSError):
+                os.unlink(entry.path)
+        except (ValueError, OSError):
+            continue
+
+
+# --- Batched fsync ---
+
+def fsync_paths(paths):
+    # Files first, then each folder once, so the renames that put them there stick
+    for path in paths:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    if fcntl is None: return  # folders cannot be opened for fsync on Windows
+    for folder in {os.path.dirname(os.path.abspath(path)) for path in paths}:
+        fd = os.open(folder, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class SyncBatch:
+    # Collects finished outputs and fsyncs them SYNC_BATCH at a time (or every
+    # SYNC_INTERVAL seconds). on_synced(item) is called for each item once its
+    # files are on disk; the batch runner journals jobs from there, so a job is
+    # only recorded as done when a power cut can no longer take its output away.
+    def __init__(self, on_synced, size=SYNC_BATCH, interval=SYNC_INTERVAL):
+        self.on_synced = on_synced
+        self.size = size
+        self.interval = interval
+        self._paths = []
+        self._items = []
+        self._since = time.monotonic()
+
+    def add(self, paths, item):
+        self._paths.extend(paths)
+        self._items.append(item)
+        if len(self._paths) >= self.size or time.monotonic() - self._since >= self.interval:
+            self.flush()
+
+    def flush(self):
+        paths, items = self._paths, self._items
+        self._paths, self._items = [], []
+        self._since = time.monotonic()
+        try:
+            fsync_paths([path for path in paths if os.path.exists(path)])
+        except OSError:
+            # Left unrecorded: a resumed batch converts them again
+            return
+        for item in items:
+            self.on_synced(item)
@@ -0,0 +1,124 @@
+import io
+
+from PIL import Image, TiffImagePlugin
+
+# --- Multi-Page Output ---
+# Writers that take one page at a time and put it on disk straight away, so a
+# 1,000-page merge holds a single decoded page in memory, never the whole set.
+# Pillow's own save_all keeps every source image open until the end, and PDF
+# append=True re-parses the growing file for each page, which is quadratic.
+
+MULTIPAGE_FORMATS = ('pdf', 'tiff')
+PDF_QUALITY = 95
+
+
+def page_output_path(out_path, index):
+    # photo.tiff -> photo_p001.tiff
+    stem, dot, ext = out_path.rpartition('.')
+    return f"{stem}_p{index:03d}{dot}{ext}"
+
+
+class TiffWriter:
+    def __init__(self, path, **save_options):
+        self.fp = open(path, 'w+b')
+        self.tiff = TiffImagePlugin.AppendingTiffWriter(self.fp)
+        self.save_options = save_options
+
+    def add_page(self, img):
+        img.load()  # decode errors surface here, before anything is appended
+        img.save(self.tiff, format='TIFF', **self.save_options)
+        self.tiff.newFrame()
+
+    def close(self):
+        self.tiff.close()
+        self.fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PdfWriter:
+    # Minimal sequential PDF: each page is one JPEG image XObject, written as it
+    # arrives. Object 1 is the catalog and object 2 the page tree; the tree,
+    # xref table and trailer are written last, once all page numbers are known.
+    def __init__(self, path, quality=PDF_QUALITY, resolution=72.0):
+        self.fp = open(path, 'wb')
+        self.quality = quality
+        self.resolution = resolution
+        self.offsets = {}
+        self.pages = []
+        self.next_id = 3
+        self.fp.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+
+    def _object(self, number, body, stream=None):
+        self.offsets[number] = self.fp.tell()
+        self.fp.write(b"%d 0 obj\n" % number)
+        self.fp.write(body)
+        if stream is not None:
+            self.fp.write(b"\nstream\n")
+            self.fp.write(stream)
+            self.fp.write(b"\nendstream")
+        self.fp.write(b"\nendobj\n")
+
+    def _reserve(self):
+        number = self.next_id
+        self.next_id += 1
+        return number
+
+    def add_page(self, img):
+        if img.mode in ('RGBA', 'LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info):
+            # Flatten onto white; PDF pages have no alpha
+            rgba = img.convert('RGBA')
+            flat = Image.new('RGB', img.size, (255, 255, 255))
+            flat.paste(rgba, mask=rgba.getchannel('A'))
+            img = flat
+        elif img.mode not in ('L', 'RGB'):
+            img = img.convert('L' if img.mode in ('1', 'I', 'I;16', 'F') else 'RGB')
+
+        data = io.BytesIO()
+        img.save(data, format='JPEG', quality=self.quality)
+        data = data.getbuffer()
+
+        dpi = img.info.get('dpi', (self.resolution, self.resolution))
+        width = img.width * 72.0 / (dpi[0] or self.resolution)
+        height = img.height * 72.0 / (dpi[1] or self.resolution)
+        colorspace = b"/DeviceGray" if img.mode == 'L' else b"/DeviceRGB"
+
+        image_id, content_id, page_id = self._reserve(), self._reserve(), self._reserve()
+        self._object(image_id, b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace %s "
+                               b"/BitsPerComponent 8 /Filter /DCTDecode /Length %d >>"
+                               % (img.width, img.height, colorspace, len(data)), data)
+        content = b"q %.4f 0 0 %.4f 0 0 cm /Im0 Do Q" % (width, height)
+        self._object(content_id, b"<< /Length %d >>" % len(content), content)
+        self._object(page_id, b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.4f %.4f] "
+                              b"/Resources << /XObject << /Im0 %d 0 R >> >> /Contents %d 0 R >>"
+                              % (width, height, image_id, content_id))
+        self.pages.append(page_id)
+
+    def close(self):
+        kids = b" ".join(b"%d 0 R" % page for page in self.pages)
+        self._object(2, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self.pages)))
+
+        xref = self.fp.tell()
+        self.fp.write(b"xref\n0 %d\n0000000000 65535 f \n" % self.next_id)
+        for number in range(1, self.next_id):
+            self.fp.write(b"%010d 00000 n \n" % self.offsets[number])
+        self.fp.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (self.next_id, xref))
+        self.fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_writer(path, fmt, save_options=None):
+    # save_options: profiles.image_options() for fmt
+    save_options = save_options or {}
+    if fmt == 'pdf': return PdfWriter(path, quality=save_options.get('quality', PDF_QUALITY))
+    return TiffWriter(path, **save_options)
@@ -0,0 +1,110 @@
+# --- Encoder Profiles ---
+# Named speed/quality trade-offs, mapped to concrete encoder settings per
+# output format. "balanced" is the default; for still images it matches the
+# settings the app always used (quality 95, Pillow's default PNG level), except
+# that TIFF is now LZW-compressed rather than written raw.
+#   fast     - bulk jobs and thumbnails: cheapest settings that still look right
+#   balanced - good quality at a reasonable encode time
+#   archival - largest/slowest: lossless or near-lossless where available
+
+PROFILES = ("fast", "balanced", "archival")
+DEFAULT_PROFILE = "balanced"
+
+# Keyword arguments for Image.save()
+IMAGE_OPTIONS = {
+    "jpeg": {
+        "fast":     {"quality": 85, "subsampling": "4:2:0"},
+        "balanced": {"quality": 95},
+        "archival": {"quality": 95, "subsampling": "4:4:4", "progressive": True, "optimize": True},
+    },
+    "png": {
+        "fast":     {"compress_level": 1},
+        "balanced": {"compress_level": 6},
+        "archival": {"compress_level": 9, "optimize": True},
+    },
+    "webp": {
+        "fast":     {"quality": 80, "method": 0},
+        "balanced": {"quality": 95, "method": 4},
+        "archival": {"lossless": True, "quality": 100, "method": 6},
+    },
+    "heic": {
+        "fast":     {"quality": 80},
+        "balanced": {"quality": 95},
+        "archival": {"quality": -1},  # pillow-heif: -1 = lossless
+    },
+    "tiff": {
+        "fast":     {},  # uncompressed: largest file, nothing to encode
+        "balanced": {"compression": "tiff_lzw"},
+        "archival": {"compression": "tiff_adobe_deflate"},
+    },
+    "pdf": {
+        "fast":     {"quality": 80},
+        "balanced": {"quality": 95},
+        "archival": {"quality": 100},
+    },
+}
+IMAGE_OPTIONS["jpg"] = IMAGE_OPTIONS["jpeg"]
+# The SVG wrapper embeds a PNG
+IMAGE_OPTIONS["svg"] = IMAGE_OPTIONS["png"]
+
+# Extra ffmpeg arguments for each re-encoding video encoder (stream copies ignore them)
+VIDEO_ARGS = {
+    "libx264": {
+        "fast":     ["-preset", "veryfast", "-crf", "23"],
+        "balanced": ["-preset", "medium", "-crf", "23"],
+        "archival": ["-preset", "slow", "-crf", "18"],
+    },
+    # libvpx's own default (deadline "good", cpu-used 0, 256 kb/s) is both slow and blurry
+    "libvpx": {
+        "fast":     ["-deadline", "realtime", "-cpu-used", "8", "-crf", "10", "-b:v", "2M"],
+        "balanced": ["-deadline", "good", "-cpu-used", "4", "-crf", "10", "-b:v", "2M"],
+        "archival": ["-deadline", "good", "-cpu-used", "1", "-crf", "6", "-b:v", "6M"],
+    },
+    "mpeg2video": {
+        "fast":     ["-q:v", "5"],
+        "balanced": ["-q:v", "3"],
+        "archival": ["-q:v", "2"],
+    },
+    "wmv2": {
+        "fast":     ["-q:v", "5"],
+        "balanced": ["-q:v", "3"],
+        "archival": ["-q:v", "2"],
+    },
+    # Animated WebP (see ffmpeg_backend.animate)
+    "libwebp_anim": {
+        "fast":     ["-quality", "70", "-compression_level", "1"],
+        "balanced": ["-quality", "80", "-compression_level", "4"],
+        "archival": ["-quality", "95", "-compression_level", "6"],
+    },
+}
+
+# paletteuse dithering for GIF output: ordered dithering is cheapest and compresses
+# best; error diffusion looks smoother on gradients
+GIF_DITHER = {"fast": "bayer:bayer_scale=3", "balanced": "sierra2_4a", "archival": "floyd_steinberg"}
+
+# Extra ffmpeg arguments for each audio encoder
+AUDIO_ARGS = {
+    "libmp3lame": {"fast": ["-b:a", "128k"], "balanced": ["-b:a", "192k"], "archival": ["-b:a", "320k"]},
+    "aac":        {"fast": ["-b:a", "128k"], "balanced": ["-b:a", "192k"], "archival": ["-b:a", "256k"]},
+    "libvorbis":  {"fast": ["-q:a", "3"], "balanced": ["-q:a", "5"], "archival": ["-q:a", "8"]},
+    "wmav2":      {"fast": ["-b:a", "128k"], "balanced": ["-b:a", "192k"], "archival": ["-b:a", "256k"]},
+    "mp2":        {"fast": ["-b:a", "192k"], "balanced": ["-b:a", "224k"], "archival": ["-b:a", "384k"]},
+    # FLAC is lossless either way; the level only trades encode time for size
+    "flac":       {"fast": ["-compression_level", "0"], "balanced": ["-compression_level", "5"], "archival": ["-compression_level", "8"]},
+}
+
+
+def image_options(fmt, profile=DEFAULT_PROFILE):
+    return dict(IMAGE_OPTIONS.get(fmt, {}).get(profile or DEFAULT_PROFILE, {}))
+
+
+def video_args(encoder, profile=DEFAULT_PROFILE):
+    return list(VIDEO_ARGS.get(encoder, {}).get(profile or DEFAULT_PROFILE, []))
+
+
+def audio_args(encoder, profile=DEFAULT_PROFILE):
+    return list(AUDIO_ARGS.get(encoder, {}).get(profile or DEFAULT_PROFILE, []))
+
+
+def gif_dither(profile=DEFAULT_PROFILE):
+    return GIF_DITHER[profile or DEFAULT_PROFILE]
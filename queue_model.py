@@ -0,0 +1,143 @@
+# --- Queue Model ---
+# Ordered set of queued file paths with O(1) add and membership, O(log n) removal, and a
+# per-file status used to colour rows. Removal leaves a hole in the slot list;
+# a Fenwick tree over the slots (1 = live, 0 = hole) maps a row position to its
+# slot in O(log n) while holes exist, and the holes are only squeezed out once
+# they pass COMPACT_FRACTION of the list, so each removal costs O(log n)
+# amortized instead of a list.remove or a full compaction per click.
+# Pinned paths are started before everything else when the batch is scheduled.
+
+COMPACT_FRACTION = 0.25
+COMPACT_MIN = 64        # small lists: holes are cheap, don't bother compacting
+
+
+class QueueModel:
+    def __init__(self):
+        self._slots = []    # paths in insertion order; removed entries become None
+        self._index = {}    # path -> slot position
+        self._status = {}   # path -> "processing" / "success" / "warning" / "error"
+        self._pinned = set()
+        self._tree = [0]    # Fenwick tree over _slots, 1-based
+        self._holes = 0
+        self.version = 0    # bumped on every structural change so views know to re-render
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, path):
+        return path in self._index
+
+    def __iter__(self):
+        return (path for path in self._slots if path is not None)
+
+    def __getitem__(self, position):
+        if not self._holes: return self._slots[position]
+        if position < 0: position += len(self._index)
+        if not 0 <= position < len(self._index): raise IndexError("queue position out of range")
+        return self._slots[self._find(position)]
+
+    # --- Fenwick tree ---
+
+    def _find(self, position):
+        # -> slot of the live entry at row `position` (binary lifting down the tree)
+        slot, remaining = 0, position + 1
+        step = 1 << (len(self._tree) - 1).bit_length()
+        while step:
+            nxt = slot + step
+            if nxt < len(self._tree) and self._tree[nxt] < remaining:
+                slot = nxt
+                remaining -= self._tree[nxt]
+            step >>= 1
+        return slot  # node slot + 1 holds the entry, which is 0-based slot `slot`
+
+    def _append_node(self):
+        # New live slot at the end: its node sums the live range it covers, which
+        # is itself plus the nodes just below it (amortized O(1))
+        node = len(self._tree)
+        total, child = 1, 1
+        while child < node & -node:
+            total += self._tree[node - child]
+            child <<= 1
+        self._tree.append(total)
+
+    def _clear_node(self, slot):
+        node = slot + 1
+        while node < len(self._tree):
+            self._tree[node] -= 1
+            node += node & -node
+
+    def _compact(self):
+        self._slots = [path for path in self._slots if path is not None]
+        self._index = {path: i for i, path in enumerate(self._slots)}
+        self._tree = [0] * (len(self._slots) + 1)
+        for node in range(1, len(self._tree)):
+            self._tree[node] += 1
+            parent = node + (node & -node)
+            if parent < len(self._tree): self._tree[parent] += self._tree[node]
+        self._holes = 0
+
+    def add(self, path):
+        if path in self._index: return False
+        self._index[path] = len(self._slots)
+        self._slots.append(path)
+        self._append_node()
+        self.version += 1
+        return True
+
+    def extend(self, paths):
+        added = 0
+        for path in paths:
+            if path not in self._index:
+                self._index[path] = len(self._slots)
+                self._slots.append(path)
+                self._append_node()
+                added += 1
+        if added: self.version += 1
+        return added
+
+    def remove(self, path):
+        slot = self._index.pop(path, None)
+        if slot is None: return False
+        self._slots[slot] = None
+        self._clear_node(slot)
+        self._status.pop(path, None)
+        self._pinned.discard(path)
+        self._holes += 1
+        if self._holes > max(COMPACT_MIN, len(self._slots) * COMPACT_FRACTION): self._compact()
+        self.version += 1
+        return True
+
+    def clear(self):
+        self._slots = []
+        self._index = {}
+        self._tree = [0]
+        self._status = {}
+        self._pinned = set()
+        self._holes = 0
+        self.version += 1
+
+    def snapshot(self):
+        return list(self)
+
+    def status(self, path):
+        return self._status.get(path)
+
+    def set_status(self, path, status):
+        if path not in self._index: return
+        if status is None: self._status.pop(path, None)
+        else: self._status[path] = status
+
+    def reset_status(self):
+        self._status = {}
+
+    def is_pinned(self, path):
+        return path in self._pinned
+
+    def toggle_pin(self, path):
+        if path not in self._index: return False
+        if path in self._pinned: self._pinned.discard(path)
+        else: self._pinned.add(path)
+        return path in self._pinned
+
+    def pinned(self):
+        return set(self._pinned)
@@ -0,0 +1,251 @@
+import math
+import sys
+from pathlib import Path
+
+import customtkinter as ctk
+
+# --- Virtualized Queue List ---
+# Only enough row cards to fill the viewport are ever created. Scrolling moves
+# a pixel offset over the QueueModel and re-binds the pooled rows to whichever
+# paths are now visible, so a 100k-file queue costs the same widgets as a 10-file one.
+
+ROW_HEIGHT = 70
+ROW_GAP = 12
+THUMB_BOX = 44  # points; thumbnails are rendered larger for Retina (see thumbnails.py)
+
+
+class QueueRow(ctk.CTkFrame):
+    def __init__(self, master, colors, on_remove, on_pin):
+        super().__init__(
+            master,
+            fg_color=colors["item_bg"],
+            corner_radius=16,
+            height=ROW_HEIGHT,
+            border_width=1,
+            border_color="#334155"
+        )
+        self.colors = colors
+        self.path = None
+        self.pinned = None
+        self.pack_propagate(False)
+
+        # Icon Box
+        icon_box = ctk.CTkFrame(self, width=50, height=50, fg_color=colors["bg_main"], corner_radius=12)
+        icon_box.pack(side="left", padx=(10, 15), pady=10)
+        icon_box.pack_propagate(False)
+        self.icon = ctk.CTkLabel(icon_box, text="", font=("Arial", 20))
+        self.icon.pack(expand=True)
+        # Laid over the emoji once a preview is ready (a CTkLabel cannot drop its image again)
+        self.thumb = ctk.CTkLabel(icon_box, text="")
+        self.thumbnail = None
+
+        # Text Info
+        info_box = ctk.CTkFrame(self, fg_color="transparent")
+        info_box.pack(side="left", fill="both", expand=True, pady=10)
+
+        self.name = ctk.CTkLabel(info_box, text="", text_color=colors["text"],
+                    font=("SF Pro Display", 14, "bold"), anchor="w")
+        self.name.pack(fill="x")
+
+        self.kind = ctk.CTkLabel(info_box, text="", text_color=colors["text_dim"],
+                    font=("Arial", 11), anchor="w")
+        self.kind.pack(fill="x")
+
+        # Delete Button
+        ctk.CTkButton(
+            self,
+            text="×",
+            width=35,
+            height=35,
+            fg_color="transparent",
+            hover_color=colors["error"],
+            text_color=colors["text_dim"],
+            font=("Arial", 20),
+            corner_radius=10,
+            command=lambda: self.path and on_remove(self.path)
+        ).pack(side="right", padx=15)
+
+        # Pin Button: pinned files are converted before the rest of the queue
+        self.pin = ctk.CTkButton(
+            self,
+            text="☆",
+            width=35,
+            height=35,
+            fg_color="transparent",
+            hover_color=colors["btn_hover"],
+            text_color=colors["text_dim"],
+            font=("Arial", 18),
+            corner_radius=10,
+            command=lambda: self.path and on_pin(self.path)
+        )
+        self.pin.pack(side="right")
+
+    def bind_path(self, path, icon, ext, status, pinned=False):
+        if path != self.path:
+            self.path = path
+            self.icon.configure(text=icon)
+            self.name.configure(text=Path(path).name)
+            self.kind.configure(text=f"{ext.upper()} File")
+            self.show_thumbnail(None)
+        self.show_pinned(pinned)
+        self.show_status(status)
+
+    def show_thumbnail(self, img):
+        if img is self.thumbnail: return
+        self.thumbnail = img
+        if img is None:
+            self.thumb.place_forget()
+            return
+        scale = THUMB_BOX / max(img.width, img.height)
+        size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+        self.thumb.configure(image=ctk.CTkImage(light_image=img, dark_image=img, size=size))
+        self.thumb.place(relx=0.5, rely=0.5, anchor="center")
+
+    def show_pinned(self, pinned):
+        if pinned == self.pinned: return
+        self.pinned = pinned
+        self.pin.configure(text="★" if pinned else "☆", text_color=self.colors["accent"] if pinned else self.colors["text_dim"])
+
+    def show_status(self, status):
+        if status == "processing":
+            self.configure(border_color=self.colors["accent"], border_width=2)
+        elif status in ("success", "error", "warning"):
+            self.configure(border_color=self.colors[status], border_width=2)
+        else:
+            self.configure(border_color="#334155", border_width=1)
+
+
+class VirtualQueueList(ctk.CTkFrame):
+    def __init__(self, master, model, colors, valid_inputs, on_remove, thumbnails=None, **kwargs):
+        super().__init__(master, fg_color="transparent", corner_radius=0, **kwargs)
+        self.model = model
+        self.thumbnails = thumbnails  # optional thumbnails.Thumbnailer
+        self.colors = colors
+        self.on_remove = on_remove
+        self.stride = ROW_HEIGHT + ROW_GAP
+        self.offset = 0
+        self.rows = []
+        self._rendered = None
+
+        self.audio_exts = set(valid_inputs['audio'])
+        self.video_exts = set(valid_inputs['video'])
+        self.image_exts = set(valid_inputs['image'])
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+        self.body = ctk.CTkFrame(self, fg_color="transparent", corner_radius=0)
+        self.body.grid(row=0, column=0, sticky="nsew", padx=5)
+
+        self.scrollbar = ctk.CTkScrollbar(
+            self,
+            width=8,
+            command=self._on_scrollbar,
+            button_color=colors["btn_default"],
+            button_hover_color=colors["btn_hover"],
+            fg_color="transparent"
+        )
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+
+        self.body.bind("<Configure>", lambda e: self.refresh(force=True))
+
+        # Same approach as CTkScrollableFrame: one global binding, filtered to our rows
+        self.bind_all("<MouseWheel>", self._on_wheel, add="+")
+        self.bind_all("<Button-4>", self._on_wheel, add="+")
+        self.bind_all("<Button-5>", self._on_wheel, add="+")
+
+    # --- Rendering ---
+
+    def _describe(self, path):
+        ext = Path(path).suffix.lower()
+        if ext in self.audio_exts: return "🎵", ext
+        if ext in self.video_exts: return "🎬", ext
+        if ext in self.image_exts: return "🖼️", ext
+        return "📄", ext
+
+    def _ensure_pool(self, height):
+        needed = math.ceil(height / self.stride) + 1
+        while len(self.rows) < needed:
+            self.rows.append(QueueRow(self.body, self.colors, self.on_remove, self.toggle_pin))
+
+    def _max_offset(self):
+        return max(0, len(self.model) * self.stride - self.body.winfo_height())
+
+    def refresh(self, force=False):
+        height = self.body.winfo_height()
+        if height <= 1: return
+
+        self.offset = min(self.offset, self._max_offset())
+        state = (self.model.version, self.offset, height)
+        if state == self._rendered and not force: return
+        self._rendered = state
+
+        self._ensure_pool(height)
+        total = len(self.model)
+        first = self.offset // self.stride
+        missing = []
+
+        for i, row in enumerate(self.rows):
+            position = first + i
+            if position >= total:
+                row.place_forget()
+                row.path = None
+                continue
+            path = self.model[position]
+            icon, ext = self._describe(path)
+            row.bind_path(path, icon, ext, self.model.status(path), self.model.is_pinned(path))
+            row.place(x=0, y=position * self.stride - self.offset + ROW_GAP // 2, relwidth=1)
+            if self.thumbnails is not None:
+                thumbnail = self.thumbnails.cached(path)
+                if thumbnail is None: missing.append(path)
+                else: row.show_thumbnail(thumbnail)
+
+        # Only rows on screen are rendered; the rest are dropped as they scroll past
+        if self.thumbnails is not None: self.thumbnails.want(missing)
+
+        # Scrollbar reflects the visible slice of the whole list
+        content = max(1, total * self.stride)
+        self.scrollbar.set(self.offset / content, min(1.0, (self.offset + height) / content))
+
+    def toggle_pin(self, path):
+        pinned = self.model.toggle_pin(path)
+        for row in self.rows:
+            if row.path == path: row.show_pinned(pinned)
+
+    def show_thumbnails(self, updates):
+        # updates: [(path, image)] finished by the Thumbnailer since the last frame
+        ready = dict(updates)
+        for row in self.rows:
+            if row.path in ready: row.show_thumbnail(ready[row.path])
+
+    def refresh_path(self, path):
+        for row in self.rows:
+            if row.path == path:
+                row.show_status(self.model.status(path))
+                return
+
+    def refresh_statuses(self):
+        for row in self.rows:
+            if row.path is not None:
+                row.show_status(self.model.status(row.path))
+
+    # --- Scrolling ---
+
+    def scroll_to(self, offset):
+        self.offset = int(max(0, min(offset, self._max_offset())))
+        self.refresh()
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self.scroll_to(float(value) * len(self.model) * self.stride)
+        elif action == "scroll":
+            step = self.body.winfo_height() if unit == "pages" else self.stride
+            self.scroll_to(self.offset + int(value) * step)
+
+    def _on_wheel(self, event):
+        if not str(event.widget).startswith(str(self.body)): return
+        if event.num == 4: delta = -self.stride // 2
+        elif event.num == 5: delta = self.stride // 2
+        elif sys.platform == "darwin": delta = -event.delta * 4
+        else: delta = -int(event.delta / 120 * self.stride)
+        self.scroll_to(self.offset + delta)
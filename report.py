@@ -0,0 +1,185 @@
+import csv
+import heapq
+import json
+import os
+import time
+
+# --- Run Report ---
+# Every converted file reports how long it spent in each stage, how many bytes
+# went in and out, and which backend did the work. RunReport keeps the per-file
+# records for export plus running totals for the live stats line, so a slow
+# batch shows whether it is bound by decoding (e.g. HEIC), encoding (e.g. x264)
+# or the disk.
+
+STAGES = ("decode", "transform", "encode", "write")
+
+
+class StageTimer:
+    # Nested stages pause the outer one, so each second is charged exactly once
+    # (e.g. a lazy decode that happens inside a transform counts as decode)
+    def __init__(self):
+        self.timings = {}
+        self._stack = []
+        self._mark = None
+
+    def _charge(self, now):
+        if self._stack:
+            name = self._stack[-1]
+            self.timings[name] = self.timings.get(name, 0.0) + now - self._mark
+        self._mark = now
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def add(self, timings):
+        # Fold in another timer's totals (e.g. encoders that ran on other threads)
+        for name, seconds in timings.items():
+            self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+
+class _Stage:
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.timer._charge(time.perf_counter())
+        self.timer._stack.append(self.name)
+
+    def __exit__(self, *exc):
+        self.timer._charge(time.perf_counter())
+        self.timer._stack.pop()
+
+
+def _round(seconds):
+    return None if seconds is None else round(seconds, 6)
+
+
+def file_record(job, result, error):
+    # One row of the report: what happened to one (job, result, error) from run_batch
+    result = result or {}
+    stages = result.get("stages", {})
+    return {
+        "path": job[0],
+        "status": "error" if error is not None else result.get("status", "error"),
+        "error": None if error is None else f"{type(error).__name__}: {error}",
+        "mode": job[1],
+        "format": job[2] if isinstance(job[2], str) else "+".join(job[2]),
+        "backend": result.get("backend"),
+        "seconds": _round(result.get("seconds")),
+        **{stage: _round(stages.get(stage)) for stage in STAGES},
+        "bytes_in": result.get("bytes_in"),
+        "bytes_out": result.get("bytes_out"),
+        "outputs": result.get("outputs", []),
+    }
+
+
+class RunReport:
+    FIELDS = ("path", "status", "error", "mode", "format", "backend", "seconds", *STAGES, "bytes_in", "bytes_out", "outputs")
+    SLOWEST = 10
+
+    def __init__(self):
+        self.created = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self.started = time.perf_counter()
+        self.records = []
+        self.counts = {}
+        self.stage_totals = dict.fromkeys(STAGES, 0.0)
+        self.backends = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._slowest = []  # min-heap of (seconds, index)
+
+    def add(self, job, result, error):
+        stages = (result or {}).get("stages", {})
+        record = file_record(job, result, error)
+        status = record["status"]
+        self.records.append(record)
+
+        self.counts[status] = self.counts.get(status, 0) + 1
+        for stage in STAGES:
+            self.stage_totals[stage] += stages.get(stage) or 0.0
+        if record["backend"]: self.backends[record["backend"]] = self.backends.get(record["backend"], 0) + 1
+        self.bytes_in += record["bytes_in"] or 0
+        self.bytes_out += record["bytes_out"] or 0
+        if record["seconds"] is not None:
+            entry = (record["seconds"], len(self.records) - 1)
+            if len(self._slowest) < self.SLOWEST: heapq.heappush(self._slowest, entry)
+            else: heapq.heappushpop(self._slowest, entry)
+        return record
+
+    def errors(self):
+        return [(r["path"], r["error"]) for r in self.records if r["status"] == "error"]
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        busy = sum(self.stage_totals.values())
+        return {
+            "files": len(self.records),
+            "counts": dict(self.counts),
+            "elapsed": round(elapsed, 3),
+            "files_per_s": round(len(self.records) / elapsed, 3) if elapsed else None,
+            "mb_in_per_s": round(self.bytes_in / 2 ** 20 / elapsed, 3) if elapsed else None,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            # Summed over files: with parallel workers this exceeds the elapsed time
+            "stage_seconds": {stage: round(t, 3) for stage, t in self.stage_totals.items()},
+            "stage_share": {stage: round(t / busy, 3) if busy else 0.0 for stage, t in self.stage_totals.items()},
+            "backends": dict(self.backends),
+            "slowest": [self.records[i]["path"] for _, i in sorted(self._slowest, reverse=True)],
+        }
+
+    def stats_line(self):
+        s = self.summary()
+        shares = "  ".join(f"{stage} {share:.0%}" for stage, share in s["stage_share"].items())
+        return f"{shares}   |   {s['files_per_s'] or 0:.1f} files/s   {s['mb_in_per_s'] or 0:.1f} MB/s in"
+
+    def save(self, path):
+        # Format follows the extension: .csv for one row per file, anything else JSON
+        if path.lower().endswith(".csv"):
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=self.FIELDS)
+                writer.writeheader()
+                for record in self.records:
+                    writer.writerow(dict(record, outputs=os.pathsep.join(record["outputs"])))
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"created": self.created, "summary": self.summary(), "files": self.records}, f, indent=2)
+
+
+# --- Single-File Profiling ---
+# For the one file that is inexplicably slow or large: convert it in-process under
+# cProfile and tracemalloc and return where the time and memory went.
+
+def trace_file(convert, job, top=25, dump_path=None):
+    import cProfile
+    import io
+    import pstats
+    import tracemalloc
+
+    profiler = cProfile.Profile()
+    tracemalloc.start(10)
+    try:
+        profiler.enable()
+        try:
+            result = convert(*job)
+        finally:
+            profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    if dump_path: profiler.dump_stats(dump_path)
+    text = io.StringIO()
+    pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(top)
+    allocations = [
+        {"where": str(stat.traceback[0]), "kb": round(stat.size / 1024, 1), "blocks": stat.count}
+        for stat in snapshot.statistics("lineno")[:top]
+    ]
+    return {
+        "result": result,
+        # Python-level allocations only; pixel buffers inside Pillow/libjpeg are not traced
+        "traced_peak_mb": round(peak / 2 ** 20, 2),
+        "top_allocations": allocations,
+        "profile": text.getvalue(),
+    }
@@ -0,0 +1,75 @@
+import os
+import threading
+import time
+
+# --- Folder Scanning ---
+# Iterative os.scandir walk: no per-file stat or Path objects, and the extension
+# test is a single lookup in a frozenset. Results are handed out in batches so a
+# consumer can stream them into the queue while the walk is still running.
+
+BATCH_SIZE = 2000
+BATCH_INTERVAL = 0.1  # seconds; flush smaller batches this often so counts stay live
+
+
+def scan_tree(root, extensions, cancel=None):
+    stack = [root]
+    while stack:
+        if cancel is not None and cancel.is_set(): return
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                subdirs = []
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif os.path.splitext(entry.name)[1].lower() in extensions and entry.is_file():
+                            yield entry.path
+                    except OSError:
+                        continue
+                # Reversed so directories are visited in listing order
+                stack.extend(reversed(subdirs))
+        except OSError:
+            # Unreadable folder (permissions, vanished network share); keep going
+            continue
+
+
+def scan_batches(root, extensions, cancel=None, batch_size=BATCH_SIZE, interval=BATCH_INTERVAL):
+    batch = []
+    last = time.monotonic()
+    for path in scan_tree(root, extensions, cancel):
+        batch.append(path)
+        now = time.monotonic()
+        if len(batch) >= batch_size or now - last >= interval:
+            if cancel is not None and cancel.is_set(): return
+            yield batch
+            batch = []
+            last = now
+    if batch and not (cancel is not None and cancel.is_set()): yield batch
+
+
+class FolderScanner(threading.Thread):
+    # Posts ("scan_batch", paths) for each batch and ("scan_done", scanner) at the
+    # end onto `results`, which the UI drains on its own thread.
+    def __init__(self, root, extensions, results):
+        super().__init__(daemon=True)
+        self.root = root
+        self.extensions = frozenset(extensions)
+        self.results = results
+        self.found = 0
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def run(self):
+        try:
+            for batch in scan_batches(self.root, self.extensions, self._cancel):
+                self.found += len(batch)
+                self.results.put(("scan_batch", batch))
+        finally:
+            self.results.put(("scan_done", self))
@@ -0,0 +1,99 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import ffmpeg_backend
+
+# --- Job Scheduling ---
+# The engine starts jobs in the order they are submitted, so that order decides
+# both how soon the first results show up and when the last one lands. Each job
+# gets a rough cost estimate (in seconds, only meaningful against other jobs in
+# the same pool) and every pool's share of the queue is reordered:
+#   - pinned jobs first, in queue order
+#   - then jobs big enough to decide when the batch ends, started right away on
+#     all but one worker so they overlap everything else instead of trailing
+#   - then the rest shortest first, so one 4 GB video no longer holds hundreds
+#     of quick images behind it
+# Image and media jobs already run on separate pools (see engine.py), so a long
+# encode never takes an image worker away.
+
+# Stills are estimated from their size alone, without opening them:
+# extension -> (compressed bytes per pixel, seconds per megapixel)
+IMAGE_COSTS = {
+    '.jpg': (0.25, 0.04), '.jpeg': (0.25, 0.04), '.webp': (0.15, 0.05),
+    '.heic': (0.12, 0.12), '.heif': (0.12, 0.12),
+    '.png': (1.5, 0.05), '.tiff': (2.0, 0.03), '.bmp': (3.0, 0.02), '.ico': (2.0, 0.02),
+}
+DEFAULT_IMAGE_COST = (1.0, 0.05)
+SVG_SECONDS = 0.2  # rasterizing cost depends on the drawing, not the file size
+
+# Media jobs are probed (duration, codecs, resolution; cached for the conversion itself)
+COPY_BYTES_PER_SECOND = 200 * 2 ** 20  # remux: bound by the disk
+VIDEO_SECONDS_PER_SECOND = 1.0         # re-encode of one second of 720p video
+ANIMATION_SECONDS_PER_SECOND = 0.3     # GIF/animated WebP: two decode passes of the source
+AUDIO_SECONDS_PER_SECOND = 0.02
+FALLBACK_BYTES_PER_SECOND = 2 ** 20    # when the duration is unknown
+REFERENCE_PIXELS = 1280 * 720
+PROBE_WORKERS = 8
+
+
+def image_cost(job):
+    filepath = job[0]
+    ext = Path(filepath).suffix.lower()
+    if ext == '.svg': return SVG_SECONDS
+    bytes_per_pixel, seconds_per_megapixel = IMAGE_COSTS.get(ext, DEFAULT_IMAGE_COST)
+    return os.path.getsize(filepath) / bytes_per_pixel / 1e6 * seconds_per_megapixel
+
+
+def media_cost(job):
+    filepath, mode, fmt = job[:3]
+    size = os.path.getsize(filepath)
+    if not ffmpeg_backend.available(): return size / FALLBACK_BYTES_PER_SECOND
+
+    info = ffmpeg_backend.probe(filepath)
+    # Multi-format jobs (see core.job_formats) pay for each output
+    return sum(output_cost(info, size, mode, f) for f in ([fmt] if isinstance(fmt, str) else fmt))
+
+
+def output_cost(info, size, mode, fmt):
+    duration = info["duration"] or size / FALLBACK_BYTES_PER_SECOND
+    if mode == "Video" and info["video"]:
+        if fmt in ffmpeg_backend.ANIMATED_FORMATS: per_second = ANIMATION_SECONDS_PER_SECOND
+        elif ffmpeg_backend.can_copy(info["video"][0], fmt, "video"): return size / COPY_BYTES_PER_SECOND
+        else: per_second = VIDEO_SECONDS_PER_SECOND
+        return duration * per_second * (info["width"] or 1280) * (info["height"] or 720) / REFERENCE_PIXELS
+    if info["audio"] and ffmpeg_backend.can_copy(info["audio"][0], fmt, "audio"): return size / COPY_BYTES_PER_SECOND
+    return duration * AUDIO_SECONDS_PER_SECOND
+
+
+def estimate(job, is_image):
+    try:
+        return image_cost(job) if is_image(job) else media_cost(job)
+    except (OSError, ValueError, ffmpeg_backend.FFmpegError):
+        return 0.0  # missing or unreadable: it fails fast, so let it fail first
+
+
+def order(jobs, costs, workers, pinned=()):
+    # jobs and costs are parallel lists; ties keep queue order
+    first = [job for job in jobs if job[0] in pinned]
+    rest = sorted((cost, i, job) for i, (job, cost) in enumerate(zip(jobs, costs)) if job[0] not in pinned)
+    head = []
+    while rest and len(head) < workers - 1 and rest[-1][0] * workers > sum(cost for cost, _, _ in rest):
+        head.append(rest.pop())
+    return first + [job for _, _, job in head + rest]
+
+
+def plan(jobs, is_image, workers=1, media_workers=1, pinned=()):
+    # -> jobs in the order they should be submitted to the engine
+    pinned = set(pinned)
+    images = [job for job in jobs if is_image(job)]
+    media = [job for job in jobs if not is_image(job)]
+
+    image_costs = [estimate(job, is_image) for job in images] if len(images) > 1 else [0.0] * len(images)
+    if len(media) > 1:
+        # Each probe is a short ffmpeg run; a handful at once hides their startup
+        with ThreadPoolExecutor(max_workers=min(PROBE_WORKERS, len(media))) as pool:
+            media_costs = list(pool.map(lambda job: estimate(job, is_image), media))
+    else:
+        media_costs = [0.0] * len(media)
+    return order(images, image_costs, workers, pinned) + order(media, media_costs, media_workers, pinned)
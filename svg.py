@@ -0,0 +1,69 @@
+import base64
+import sys
+
+from PIL import Image
+
+# --- SVG In / Out ---
+# Input: render with cairosvg onto an in-memory cairo surface and hand its pixel
+# buffer straight to Pillow, instead of encoding a PNG and decoding it again.
+# Output: the raster is PNG-encoded directly into a base64 writer on the output
+# file, so no PNG bytes, base64 string or SVG string is ever held in memory.
+
+DEFAULT_DPI = 96
+PNG_MODES = ('1', 'L', 'LA', 'P', 'RGB', 'RGBA', 'I;16')
+
+# cairo keeps ARGB32 as native-endian premultiplied words. Pillow unpacks the
+# little-endian layout (B, G, R, a) and un-premultiplies in the same pass.
+CAIRO_RAW_MODE = 'BGRa' if sys.byteorder == 'little' else 'ARGB'
+
+
+def rasterize(filepath, dpi=DEFAULT_DPI, width=None, height=None):
+    # width/height (pixels) override the document size; giving only one keeps the aspect ratio
+    from cairosvg.parser import Tree
+    from cairosvg.surface import PNGSurface
+
+    surface = PNGSurface(Tree(url=filepath), None, dpi, output_width=width, output_height=height)
+    try:
+        surface.cairo.flush()
+        w, h = surface.width, surface.height
+        return Image.frombuffer('RGBA', (w, h), surface.cairo.get_data(), 'raw', CAIRO_RAW_MODE, surface.cairo.get_stride(), 1)
+    finally:
+        surface.finish()
+
+
+class Base64Writer:
+    # Minimal file object for Image.save(): base64-encodes in 3-byte aligned
+    # pieces and writes them through to `out` as they arrive
+    def __init__(self, out):
+        self.out = out
+        self.pending = b""
+
+    def write(self, data):
+        size = len(data)
+        data = self.pending + bytes(data)
+        cut = len(data) - len(data) % 3
+        if cut: self.out.write(base64.b64encode(data[:cut]))
+        self.pending = data[cut:]
+        return size
+
+    def flush(self):
+        pass
+
+    def close(self):
+        if self.pending: self.out.write(base64.b64encode(self.pending))
+        self.pending = b""
+
+
+def write_embedded(img, out_path, **png_options):
+    # SVG wrapper around the image as an embedded PNG
+    width, height = img.size
+    with open(out_path, 'wb') as f:
+        f.write(
+            f'<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<svg width="{width}" height="{height}" xmlns="http://www.w3.org/2000/svg">\n'
+            f'  <image width="{width}" height="{height}" href="data:image/png;base64,'.encode()
+        )
+        encoder = Base64Writer(f)
+        img.save(encoder, format='PNG', **png_options)
+        encoder.close()
+        f.write(b'"/>\n</svg>')
@@ -0,0 +1,56 @@
+import os
+
+from PIL import Image
+
+from cache import ConversionCache
+
+
+def make_output(folder, name, color):
+    folder.mkdir(exist_ok=True)
+    Image.new("RGB", (8, 8), color).save(folder / name)
+    return str(folder / name)
+
+
+def test_hit_is_restored_under_the_jobs_name(tmp_path):
+    cache = ConversionCache(root=str(tmp_path / "cache"))
+    out = tmp_path / "out"
+    cache.store("k", [make_output(out, "img0 (2).webp", "red")], "img0 (2)")
+    os.unlink(out / "img0 (2).webp")
+    assert cache.restore("k", str(out), "img0") == [str(out / "img0.webp")]
+    assert sorted(os.listdir(out)) == ["img0.webp"]
+    cache.close()
+
+
+def test_hit_never_replaces_another_file(tmp_path):
+    cache = ConversionCache(root=str(tmp_path / "cache"))
+    out = tmp_path / "out"
+    cache.store("a", [make_output(out, "img.png", "red")], "img")
+    os.unlink(out / "img.png")
+    make_output(out, "img.png", "blue")  # another source's output took the name
+    assert cache.restore("a", str(out), "img") is None
+    with Image.open(out / "img.png") as img:
+        assert img.getpixel((0, 0)) == (0, 0, 255)
+    cache.close()
+
+
+def test_output_edited_in_place_is_not_served_back(tmp_path):
+    cache = ConversionCache(root=str(tmp_path / "cache"))
+    out = tmp_path / "out"
+    path = make_output(out, "img.png", "red")
+    cache.store("k", [path], "img")
+    with open(path, "r+b") as f:  # same size, different bytes, through the shared inode
+        f.seek(-1, os.SEEK_END)
+        last = f.read(1)
+        f.seek(-1, os.SEEK_END)
+        f.write(bytes([last[0] ^ 0xFF]))
+    assert cache.restore("k", str(out), "img") is None
+    cache.close()
+
+
+def test_output_still_in_place_is_reused(tmp_path):
+    cache = ConversionCache(root=str(tmp_path / "cache"))
+    out = tmp_path / "out"
+    path = make_output(out, "img.png", "red")
+    cache.store("k", [path], "img")
+    assert cache.restore("k", str(out), "img") == [path]
+    cache.close()
@@ -0,0 +1,20 @@
+import journal
+from journal import BatchJournal
+
+
+def test_running_batch_is_not_offered_for_resume(tmp_path):
+    jobs = [("/src/a.png", "Image", "jpg", "/out", {})]
+    live = BatchJournal.create(jobs, str(tmp_path))
+    live.record(jobs[0], "error")
+    assert journal.unfinished(str(tmp_path)) == []
+    assert journal.find(root=str(tmp_path)) is None
+
+    live.close()  # interrupted
+    resumed = journal.find(root=str(tmp_path))
+    try:
+        assert resumed.batch_id == live.batch_id
+        assert resumed.pending() == jobs
+        # Now it is this run's: a second resume does not get it too
+        assert journal.find(root=str(tmp_path)) is None
+    finally:
+        resumed.close()
@@ -0,0 +1,77 @@
+import fcntl
+import os
+import threading
+import time
+
+import output
+
+
+def hold(path):
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    return fd
+
+
+def is_held(path):
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return False
+    except BlockingIOError:
+        return True
+    finally:
+        os.close(fd)
+
+
+def slot_locks(tmp_path, target):
+    return [os.path.join(tmp_path, f".write-{output.device(target)}-{slot}.lock") for slot in range(output.WRITE_SLOTS)]
+
+
+def test_second_writer_gets_free_slot(tmp_path, monkeypatch):
+    monkeypatch.setattr(output, "staging_dir", lambda: str(tmp_path))
+    target = str(tmp_path / "out.png")
+    first, second = slot_locks(tmp_path, target)
+    fd = hold(first)
+    try:
+        with output.write_slot(target):
+            assert is_held(second)
+    finally:
+        os.close(fd)
+    assert not is_held(second)
+
+
+def test_waiter_takes_whichever_slot_frees_first(tmp_path, monkeypatch):
+    monkeypatch.setattr(output, "staging_dir", lambda: str(tmp_path))
+    target = str(tmp_path / "out.png")
+    first, second = slot_locks(tmp_path, target)
+    fds = [hold(first), hold(second)]
+    # Free slot 1 only: slot 0 stays held for the whole test
+    threading.Timer(0.1, os.close, (fds[1],)).start()
+    started = time.monotonic()
+    try:
+        with output.write_slot(target):
+            assert time.monotonic() - started < 1.0
+            assert is_held(second)
+    finally:
+        os.close(fds[0])
+
+
+def test_write_slots_limit_concurrency(tmp_path, monkeypatch):
+    monkeypatch.setattr(output, "staging_dir", lambda: str(tmp_path))
+    target = str(tmp_path / "out.png")
+    lock = threading.Lock()
+    active, peak = [0], [0]
+
+    def write():
+        with output.write_slot(target):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+
+    threads = [threading.Thread(target=write) for _ in range(6)]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    assert peak[0] == output.WRITE_SLOTS
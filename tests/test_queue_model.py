@@ -0,0 +1,63 @@
+import random
+
+from queue_model import COMPACT_FRACTION, QueueModel
+
+
+def test_positions_follow_removals():
+    rng = random.Random(0)
+    model, expected = QueueModel(), []
+    for step in range(5000):
+        if expected and rng.random() < 0.45:
+            path = expected.pop(rng.randrange(len(expected)))
+            assert model.remove(path)
+        else:
+            path = f"/f/{step}"
+            model.add(path)
+            expected.append(path)
+        if step % 50 == 0:
+            assert [model[i] for i in range(len(model))] == expected
+    assert list(model) == expected
+    assert model[-1] == expected[-1]
+
+
+class CountingList(list):
+    reads = 0
+
+    def __getitem__(self, index):
+        self.reads += 1
+        return super().__getitem__(index)
+
+
+class CountingModel(QueueModel):
+    # Counts Fenwick tree reads and the slots every compaction copies
+    copied = 0
+
+    def _compact(self):
+        self.copied += len(self._slots)
+        super()._compact()
+        self._tree = CountingList(self._tree)
+
+
+def test_remove_then_lookup_is_logarithmic():
+    n = 200_000
+    model = CountingModel()
+    model.extend(f"/f/{i}" for i in range(n))
+    model._tree = CountingList(model._tree)
+    for i in range(200):
+        model.remove(f"/f/{i * 7}")
+        for position in range(20):  # the rows a refresh re-binds
+            model[position]
+    # No compaction yet, and each removal or lookup reads O(log n) tree nodes
+    assert model.copied == 0
+    assert model._tree.reads <= 200 * 21 * 2 * n.bit_length()
+
+
+def test_compaction_is_amortized():
+    n = 10_000
+    model = CountingModel()
+    model.extend(f"/f/{i}" for i in range(n))
+    for i in range(n):
+        model.remove(f"/f/{i}")
+    # Holes are squeezed out in rounds of a quarter of the list, not per removal
+    assert model.copied <= n / COMPACT_FRACTION
+    assert len(model) == 0 and list(model) == []
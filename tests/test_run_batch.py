@@ -0,0 +1,64 @@
+import shutil
+
+from PIL import Image
+
+from cache import ConversionCache
+from core import run_batch
+from engine import ConversionEngine
+
+
+def test_duplicate_copies_are_cached_for_the_next_run(tmp_path):
+    src, out_dir = tmp_path / "src", tmp_path / "out"
+    src.mkdir()
+    out_dir.mkdir()
+    Image.new("RGB", (16, 16), "red").save(src / "original.png")
+    shutil.copy(src / "original.png", src / "copy0.png")
+    jobs = [(str(src / name), "Image", "jpg", str(out_dir), {}) for name in ("original.png", "copy0.png")]
+
+    cache = ConversionCache(root=str(tmp_path / "cache"))
+    try:
+        with ConversionEngine(workers=1) as engine:
+            first = {job[0]: result["backend"] for job, result, _ in run_batch(engine, jobs, cache=cache)}
+            second = {job[0]: result["backend"] for job, result, _ in run_batch(engine, jobs, cache=cache)}
+    finally:
+        cache.close()
+    assert first == {jobs[0][0]: "pillow", jobs[1][0]: "duplicate"}
+    assert second == {jobs[0][0]: "cache", jobs[1][0]: "cache"}
+    assert sorted(p.name for p in out_dir.iterdir()) == ["copy0.jpg", "original.jpg"]
+
+
+def test_multi_format_job_writes_every_format(tmp_path):
+    from core import convert_file
+    Image.new("RGBA", (300, 200), (255, 0, 0, 128)).save(tmp_path / "a.png")
+    formats = ("jpg", "webp", "png", "ico", "icns", "bmp")
+    result = convert_file(str(tmp_path / "a.png"), "Image", formats, str(tmp_path))
+    assert result["status"] == "success"
+    for fmt in formats:
+        with Image.open(tmp_path / f"a.{fmt}") as out:
+            out.load()
+
+
+def test_cache_misses_start_before_every_lookup_is_done(tmp_path):
+    import threading
+    for name, color in (("slow.png", "red"), ("fast.png", "blue")):
+        Image.new("RGB", (16, 16), color).save(tmp_path / name)
+    jobs = [(str(tmp_path / name), "Image", "jpg", str(tmp_path), {}) for name in ("slow.png", "fast.png")]
+    converted = threading.Event()
+
+    class SlowCache(ConversionCache):
+        def key(self, path, settings):
+            # Hashing slow.png only finishes once fast.png has been converted
+            if path.endswith("slow.png"): assert converted.wait(10)
+            return super().key(path, settings)
+
+    cache = SlowCache(root=str(tmp_path / "cache"))
+    try:
+        with ConversionEngine(workers=1) as engine:
+            order = []
+            for job, result, error in run_batch(engine, jobs, cache=cache):
+                assert error is None
+                order.append(job[0])
+                converted.set()
+    finally:
+        cache.close()
+    assert order == [jobs[1][0], jobs[0][0]]
@@ -0,0 +1,62 @@
+import threading
+
+import pytest
+from PIL import Image
+
+import watcher
+from engine import ConversionEngine
+
+
+def watch(root, out_dir, state_dir, poll_interval, seconds):
+    results = []
+    stop = threading.Event()
+    threading.Timer(seconds, stop.set).start()
+    with ConversionEngine(workers=1, media_workers=1) as engine:
+        folder_watcher = watcher.FolderWatcher(root, ("Image", "png", out_dir, {}), engine, state_dir,
+                                               settle=0.1, poll_interval=poll_interval)
+        folder_watcher.run(stop, lambda job, result, error: results.append((job[0], result, error)))
+    return results
+
+
+@pytest.mark.parametrize("poll_interval", [
+    0.1,
+    pytest.param(None, marks=pytest.mark.skipif(not watcher.inotify_available(), reason="needs inotify")),
+])
+def test_output_into_watched_folder_is_not_reconverted(tmp_path, poll_interval):
+    root = tmp_path / "drop"
+    root.mkdir()
+    Image.new("RGB", (8, 8), "red").save(root / "a.jpg")
+    results = watch(str(root), str(root), str(tmp_path / "state"), poll_interval, seconds=1.5)
+    assert [path for path, _, _ in results] == [str(root / "a.jpg")]
+    assert (root / "a.png").exists()
+
+
+def test_same_format_output_does_not_replace_its_source(tmp_path):
+    root = tmp_path / "drop"
+    root.mkdir()
+    Image.new("RGB", (8, 8), "red").save(root / "a.png")
+    source = (root / "a.png").read_bytes()
+    results = watch(str(root), str(root), str(tmp_path / "state"), 0.1, seconds=1.5)
+    assert len(results) == 1
+    assert (root / "a.png").read_bytes() == source
+    assert sorted(p.name for p in root.iterdir()) == ["a (2).png", "a.png"]
+
+
+def test_same_stem_sources_get_numbered_outputs(tmp_path):
+    root, out_dir = tmp_path / "drop", tmp_path / "out"
+    root.mkdir()
+    out_dir.mkdir()
+    Image.new("RGB", (8, 8), "red").save(root / "photo.jpg")
+    Image.new("RGB", (8, 8), "blue").save(root / "photo.bmp")
+    results = watch(str(root), str(out_dir), str(tmp_path / "state"), 0.1, seconds=1.5)
+    assert len(results) == 2
+    assert sorted(p.name for p in out_dir.iterdir()) == ["photo (2).png", "photo.png"]
+
+
+@pytest.mark.parametrize("flag", [["--sync"], ["--no-dedupe"], ["--first", "*.png"], ["--no-cache"], ["--cache-size", "10"], ["--hash"]])
+def test_batch_only_flags_are_rejected_with_watch(tmp_path, capsys, flag):
+    import cli
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main([str(tmp_path), "-m", "Image", "-f", "png", "-o", str(tmp_path), "--watch", *flag])
+    assert exit_info.value.code == 2
+    assert flag[0] in capsys.readouterr().err
@@ -0,0 +1,197 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+import ffmpeg_backend
+from cache import default_cache_dir
+from core import HEIF_EXTENSIONS, RESIZABLE_MODES, VALID_INPUTS, load_heif, open_image
+
+# --- Queue Thumbnails ---
+# Small previews for queue rows, made on demand and only for rows on screen:
+#   images - JPEG decodes at 1/8 scale via draft(), HEIC uses its embedded thumbnail
+#   video  - one frame grabbed by ffmpeg a tenth of the way in (audio: cover art, if any)
+# Finished thumbnails are kept decoded in a small in-memory LRU (bounded in bytes)
+# and as PNGs of a few KB under <cache>/thumbs, keyed on path, size and mtime. The
+# folder is trimmed oldest-first (by mtime, refreshed on every hit) past its cap.
+
+THUMB_SIZE = 96                       # longest edge; rows show it at 44pt, 88px on Retina
+MEMORY_MAX_BYTES = 16 * 1024 ** 2     # ~450 RGBA thumbnails
+DISK_MAX_BYTES = 64 * 1024 ** 2
+DISK_TRIM_TO = 0.75                   # fraction of the cap left after trimming
+THUMB_VERSION = 1
+WORKERS = 2
+
+MEDIA_EXTENSIONS = frozenset(VALID_INPUTS['video']) | frozenset(VALID_INPUTS['audio'])
+NO_PREVIEW = {'.svg'}  # would need Cairo
+
+
+def render(path, size=THUMB_SIZE):
+    # -> Pillow image fitting size x size, or None when the file has no picture
+    ext = Path(path).suffix.lower()
+    if ext in NO_PREVIEW: return None
+    if ext in MEDIA_EXTENSIONS:
+        png = ffmpeg_backend.grab_frame(path, size) if ffmpeg_backend.available() else None
+        if png is None: return None
+        img = Image.open(io.BytesIO(png))
+        img.load()
+        return img
+
+    if ext in HEIF_EXTENSIONS: load_heif()
+    with open_image(path, (size, size)) as src:
+        # Rotate after the draft request: transposing a small decode is free
+        img = ImageOps.exif_transpose(src)
+        img.thumbnail((size, size), Image.Resampling.BILINEAR, reducing_gap=2.0)
+    if img.mode not in RESIZABLE_MODES: img = img.convert('RGBA')
+    return img
+
+
+class ThumbnailStore:
+    def __init__(self, root=None, memory_max_bytes=MEMORY_MAX_BYTES, disk_max_bytes=DISK_MAX_BYTES):
+        self.root = root or os.path.join(default_cache_dir(), "thumbs")
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # path -> image, least recently used first
+        self._memory_bytes = 0
+        self._disk_bytes = None       # counted on first write
+
+    # --- Memory (any thread; the UI only ever looks here) ---
+
+    def cached(self, path):
+        with self._lock:
+            img = self._memory.get(path)
+            if img is not None: self._memory.move_to_end(path)
+            return img
+
+    def _remember(self, path, img):
+        with self._lock:
+            old = self._memory.pop(path, None)
+            if old is not None: self._memory_bytes -= _image_bytes(old)
+            self._memory[path] = img
+            self._memory_bytes += _image_bytes(img)
+            while self._memory_bytes > self.memory_max_bytes and len(self._memory) > 1:
+                _, dropped = self._memory.popitem(last=False)
+                self._memory_bytes -= _image_bytes(dropped)
+
+    # --- Disk (worker threads) ---
+
+    def _file(self, path):
+        st = os.stat(path)
+        key = f"{THUMB_VERSION}|{THUMB_SIZE}|{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}"
+        name = hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+        return os.path.join(self.root, name[:2], f"{name}.png")
+
+    def load(self, path):
+        # -> image from memory or disk, rendering (and storing) it on a miss
+        img = self.cached(path)
+        if img is not None: return img
+
+        thumb = self._file(path)
+        try:
+            with Image.open(thumb) as stored:
+                stored.load()
+                img = stored.copy()
+            os.utime(thumb)  # mtime is the LRU clock
+        except (OSError, ValueError):
+            img = render(path)
+            if img is None: return None
+            self._write(thumb, img)
+        self._remember(path, img)
+        return img
+
+    def _write(self, thumb, img):
+        os.makedirs(os.path.dirname(thumb), exist_ok=True)
+        buffer = io.BytesIO()
+        img.save(buffer, "PNG", compress_level=1)
+        tmp = f"{thumb}.{os.getpid()}-{threading.get_ident()}"
+        with open(tmp, "wb") as f:
+            f.write(buffer.getbuffer())
+        os.replace(tmp, thumb)
+
+        with self._lock:
+            if self._disk_bytes is None: self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+            else: self._disk_bytes += buffer.tell()
+            if self._disk_bytes <= self.disk_max_bytes: return
+        self._trim()
+
+    def _disk_entries(self):
+        # -> [(mtime, size, path)] of every stored thumbnail
+        entries = []
+        with os.scandir(self.root) as buckets:
+            for bucket in buckets:
+                if not bucket.is_dir(): continue
+                with os.scandir(bucket.path) as files:
+                    for entry in files:
+                        try:
+                            st = entry.stat()
+                        except OSError:
+                            continue
+                        entries.append((st.st_mtime, st.st_size, entry.path))
+        return entries
+
+    def _trim(self):
+        entries = sorted(self._disk_entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, thumb in entries:
+            if total <= self.disk_max_bytes * DISK_TRIM_TO: break
+            try:
+                os.unlink(thumb)
+            except OSError:
+                continue
+            total -= size
+        with self._lock:
+            self._disk_bytes = total
+
+
+def _image_bytes(img):
+    return img.width * img.height * len(img.getbands())
+
+
+class Thumbnailer:
+    # Renders thumbnails for whichever paths the view currently wants, on a small
+    # thread pool. Requests for rows scrolled past before their turn are dropped
+    # unrendered, so flinging through a long queue never builds up a backlog.
+    def __init__(self, on_ready, store=None, workers=WORKERS):
+        self.on_ready = on_ready  # on_ready(path, image), called on a worker thread
+        self.store = store or ThumbnailStore()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnail")
+        self._lock = threading.Lock()
+        self._wanted = set()
+        self._queued = set()
+        self._failed = set()  # no picture, or unreadable: not retried this session
+
+    def cached(self, path):
+        return self.store.cached(path)
+
+    def want(self, paths):
+        with self._lock:
+            self._wanted = set(paths)
+            todo = [path for path in paths if path not in self._queued and path not in self._failed]
+            self._queued.update(todo)
+        for path in todo:
+            self._pool.submit(self._make, path)
+
+    def _make(self, path):
+        with self._lock:
+            if path not in self._wanted:
+                self._queued.discard(path)
+                return
+        try:
+            img = self.store.load(path)
+        except Exception:
+            img = None
+        with self._lock:
+            self._queued.discard(path)
+            if img is None: self._failed.add(path)
+        if img is not None: self.on_ready(path, img)
+
+    def shutdown(self):
+        with self._lock:
+            self._wanted = set()
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,163 @@
+import io
+import json
+
+from PIL import Image, ImageColor
+
+# --- Image Transforms ---
+# Optional steps between decode and encode, so resizing, padding or flattening no
+# longer needs a second tool and a second decode/encode. Driven by job options:
+#   max_size    - [width, height] box, applied according to `fit`:
+#                   "fit"  - shrink to fit inside the box, never enlarge (default)
+#                   "fill" - cover the box and centre-crop to exactly its size
+#                   "pad"  - fit inside, then centre on a canvas of exactly the box
+#   auto_rotate - apply the EXIF orientation (outputs carry no EXIF to do it later)
+#   colorspace  - "rgb" (embedded ICC profiles converted to sRGB) or "gray"
+#   flatten     - composite transparency onto `background` (default white)
+# Steps are ordered so every copy happens at output size: crop and shrink run as
+# one resize() (with a source box) straight from the decoded buffer, and rotation,
+# colour conversion, padding and flattening only ever touch the small result.
+# All of it runs inside Pillow's C core; NumPy round trips were several times
+# slower on the same buffers and would pull a heavy import into every worker.
+
+FIT_MODES = ('fit', 'fill', 'pad')
+COLORSPACES = ('rgb', 'gray')
+DEFAULT_BACKGROUND = 'white'
+OPTION_KEYS = ('max_size', 'fit', 'auto_rotate', 'colorspace', 'flatten', 'background')
+
+ORIENTATION = 0x0112
+# EXIF orientation -> transpose that undoes it (5-8 also swap width and height)
+TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT, 3: Image.Transpose.ROTATE_180, 4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE, 6: Image.Transpose.ROTATE_270, 7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+
+def settings(options):
+    # -> the transform part of a job's options, or None when there is nothing to do
+    found = {key: options[key] for key in OPTION_KEYS if options.get(key)}
+    if not any(key in found for key in ('max_size', 'auto_rotate', 'colorspace', 'flatten')): return None
+    return found
+
+
+def key(transform):
+    # Stable text for caches keyed on the pixels a transform produces
+    return json.dumps(transform, sort_keys=True) if transform else None
+
+
+def parse_size(text):
+    # "1920" -> [1920, 1920], "1200x630" -> [1200, 630]
+    width, _, height = text.lower().partition('x')
+    size = [int(width), int(height or width)]
+    if min(size) < 1: raise ValueError(f"size must be positive: {text}")
+    return size
+
+
+def draft_size(transform):
+    # Smallest decode that still covers the output (see core.open_image)
+    if not transform or not transform.get('max_size'): return None
+    width, height = transform['max_size']
+    # The orientation is only known once the header is read: allow either way round
+    if transform.get('auto_rotate'): width = height = max(width, height)
+    return (width, height)
+
+
+def has_alpha(img):
+    return img.mode in ('RGBA', 'LA', 'PA', 'La', 'RGBa') or 'transparency' in img.info
+
+
+# --- Geometry ---
+
+def fit_size(size, box):
+    scale = min(box[0] / size[0], box[1] / size[1], 1.0)
+    return (max(1, round(size[0] * scale)), max(1, round(size[1] * scale)))
+
+
+def cover_crop(size, box):
+    # -> centred source rectangle with the box's aspect ratio, as large as possible
+    width, height = size
+    if width * box[1] > height * box[0]:
+        crop_w, crop_h = height * box[0] / box[1], height
+    else:
+        crop_w, crop_h = width, width * box[1] / box[0]
+    left, top = (width - crop_w) / 2, (height - crop_h) / 2
+    return (left, top, left + crop_w, top + crop_h)
+
+
+def compose(img, size, color, keep_alpha):
+    # img centred on a canvas of `size`; transparency is flattened onto color unless
+    # keep_alpha, in which case the margin is transparent. One canvas, one paste.
+    alpha = has_alpha(img)
+    if alpha and keep_alpha:
+        canvas = Image.new(img.mode, size)
+    else:
+        mode = 'L' if img.mode in ('L', 'LA') else 'RGB'
+        canvas = Image.new(mode, size, ImageColor.getcolor(color, mode))
+    offset = ((size[0] - img.width) // 2, (size[1] - img.height) // 2)
+    if alpha and not keep_alpha:
+        canvas.paste(img, offset, mask=img.getchannel('A'))
+    else:
+        canvas.paste(img, offset)
+    return canvas
+
+
+# --- Pipeline ---
+
+def apply(img, transform):
+    # -> transformed image (img itself when nothing had to change). img must be loaded.
+    if not transform: return img
+    fit = transform.get('fit') or 'fit'
+    box = transform.get('max_size')
+    color = transform.get('background') or DEFAULT_BACKGROUND
+    flatten = bool(transform.get('flatten'))
+
+    orientation = img.getexif().get(ORIENTATION, 1) if transform.get('auto_rotate') else 1
+    # Palette and bilevel images cannot be resampled or blended: expand them first
+    if img.mode in ('P', 'PA'):
+        img = img.convert('RGBA' if has_alpha(img) else 'RGB')
+    elif img.mode == '1' or (img.mode in ('L', 'RGB') and 'transparency' in img.info):
+        img = img.convert({'1': 'L', 'L': 'LA', 'RGB': 'RGBA'}[img.mode])
+
+    if box:
+        # Resize for the stored orientation, then rotate the small result
+        target = tuple(box[::-1]) if orientation in (5, 6, 7, 8) else tuple(box)
+        if fit == 'fill':
+            if img.size != target:
+                img = img.resize(target, Image.Resampling.LANCZOS, box=cover_crop(img.size, target), reducing_gap=3.0)
+        else:
+            size = fit_size(img.size, target)
+            if size != img.size: img = img.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+    if orientation in TRANSPOSE:
+        img = img.transpose(TRANSPOSE[orientation])
+
+    colorspace = transform.get('colorspace')
+    if colorspace == 'rgb':
+        img = to_srgb(img)
+    elif colorspace == 'gray' and img.mode not in ('L', 'LA'):
+        img = img.convert('LA' if has_alpha(img) else 'L')
+
+    if box and fit == 'pad' and img.size != tuple(box):
+        img = compose(img, tuple(box), color, keep_alpha=not flatten)
+    elif flatten and has_alpha(img):
+        img = compose(img, img.size, color, keep_alpha=False)
+    return img
+
+
+def to_srgb(img):
+    alpha = has_alpha(img)
+    mode = 'RGBA' if alpha else 'RGB'
+    icc = img.info.get('icc_profile')
+    if icc and img.mode in ('RGB', 'RGBA', 'CMYK'):
+        from PIL import ImageCms
+        try:
+            source = ImageCms.ImageCmsProfile(io.BytesIO(icc))
+            converted = ImageCms.profileToProfile(img, source, ImageCms.createProfile('sRGB'), outputMode=mode)
+        except ImageCms.PyCMSError:
+            converted = None  # Broken profile: fall back to a plain mode conversion
+        if converted is not None:
+            converted.info.pop('icc_profile', None)
+            return converted
+    if img.mode == mode: return img
+    converted = img.convert(mode)
+    converted.info.pop('icc_profile', None)
+    return converted
@@ -0,0 +1,78 @@
+import queue
+
+# --- UI Update Channel ---
+# Worker threads never touch Tk widgets. They put (kind, payload) messages on
+# this channel and the Tk loop drains it every frame via `after`. Per kind, a
+# subscriber chooses how bursts are delivered:
+#
+#   "latest" - only the newest payload of the frame (progress bars, counters)
+#   "batch"  - every payload of the frame as one list (row status changes)
+#   "each"   - one call per message, in order (finish, errors)
+#
+# Pending "latest"/"batch" payloads are flushed before any "each" message, so
+# e.g. the last row updates always land before a "finish" handler runs.
+
+DEFAULT_FPS = 30
+
+
+class UiChannel:
+    def __init__(self, widget, fps=DEFAULT_FPS):
+        self.widget = widget
+        self.interval = max(1, int(1000 / fps))
+        self._messages = queue.SimpleQueue()
+        self._handlers = {}
+        self._running = False
+
+    def subscribe(self, kind, handler, mode="each"):
+        if mode not in ("latest", "batch", "each"):
+            raise ValueError(f"unknown delivery mode: {mode}")
+        self._handlers[kind] = (handler, mode)
+
+    # Safe to call from any thread. Named put() so it can stand in for a queue.
+    def put(self, message):
+        self._messages.put(message)
+
+    def post(self, kind, payload=None):
+        self._messages.put((kind, payload))
+
+    def start(self):
+        if not self._running:
+            self._running = True
+            self.widget.after(self.interval, self._tick)
+
+    def stop(self):
+        self._running = False
+
+    def _tick(self):
+        if not self._running: return
+        try:
+            self.drain()
+        finally:
+            self.widget.after(self.interval, self._tick)
+
+    def drain(self):
+        latest = {}
+        batches = {}
+
+        def flush():
+            for kind, payload in latest.items(): self._handlers[kind][0](payload)
+            for kind, payloads in batches.items(): self._handlers[kind][0](payloads)
+            latest.clear()
+            batches.clear()
+
+        # Only what is queued now; anything posted meanwhile waits for the next frame
+        for _ in range(self._messages.qsize()):
+            try:
+                kind, payload = self._messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind not in self._handlers: continue
+            handler, mode = self._handlers[kind]
+            if mode == "latest":
+                latest[kind] = payload
+            elif mode == "batch":
+                batches.setdefault(kind, []).append(payload)
+            else:
+                flush()
+                handler(payload)
+        flush()
@@ -0,0 +1,388 @@
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import os
+import select
+import sqlite3
+import struct
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from pathlib import Path
+
+import scheduler
+from cache import default_cache_dir
+from core import SUPPORTED_EXTENSIONS, convert_file, is_image_job, remove_partials, warm_worker
+from duplicates import numbered_stem
+
+# --- Watch Folder ---
+# Converts whatever lands in a drop folder, for as long as it runs:
+#   source   - inotify on Linux, otherwise a poll that only re-lists folders whose
+#              mtime changed, so an idle folder of 100k files costs a stat per folder
+#   settling - a file is converted once its size and mtime have held still for
+#              `settle` seconds, so copies still in progress are left alone
+#   queue    - a small SQLite table of every file seen, with its size/mtime and
+#              state; files queued, running or failed when the watcher stopped are
+#              picked up again on the next start, and finished ones are never redone
+#   engine   - one ConversionEngine for the whole session, warmed up front, fed a
+#              few jobs per worker at a time
+#   names    - every file keeps the output name it was first given; a later file
+#              whose outputs would take an existing name (photo.jpg, then
+#              photo.heic) gets a numbered one, as in a batch (duplicates.py)
+# Hidden files (including our own partial outputs) and the output folder, when it
+# sits inside the watched folder, are ignored. Outputs written into the watched
+# folder itself (-o pointing at it) are recorded in the queue as they are written,
+# so their arrival is not mistaken for a new file to convert.
+
+SETTLE_SECONDS = 2.0
+POLL_INTERVAL = 2.0
+TICK = 0.2            # longest wait for file events or finished jobs
+JOBS_PER_WORKER = 2   # in flight per worker; the rest wait in the queue
+
+
+def default_state_dir():
+    return os.path.join(default_cache_dir(), "watch")
+
+
+def list_dir(directory, extensions, skip=()):
+    # -> (subfolders, candidate files) of one folder
+    subdirs, files = [], []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.startswith('.'): continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.path not in skip: subdirs.append(entry.path)
+                elif os.path.splitext(entry.name)[1].lower() in extensions and entry.is_file():
+                    files.append(entry.path)
+            except OSError:
+                continue
+    return subdirs, files
+
+
+# --- Change Sources ---
+# changes(timeout) -> paths created or rewritten since the last call (may repeat)
+
+class PollSource:
+    name = "poll"
+
+    def __init__(self, root, extensions, skip=(), interval=POLL_INTERVAL):
+        self.root = root
+        self.extensions = extensions
+        self.skip = skip
+        self.interval = interval
+        self.folders = {}  # folder -> (mtime_ns or None, subfolders, files)
+        self.next_poll = 0.0
+
+    def snapshot(self):
+        self.next_poll = time.monotonic() + self.interval
+        return self._walk()
+
+    def changes(self, timeout):
+        wait = self.next_poll - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return []
+        if wait > 0: time.sleep(wait)
+        self.next_poll = time.monotonic() + self.interval
+        return self._walk()
+
+    def _walk(self):
+        found, seen = [], set()
+        stack = [self.root]
+        while stack:
+            folder = stack.pop()
+            seen.add(folder)
+            try:
+                mtime = os.stat(folder).st_mtime_ns
+            except OSError:
+                continue
+            known = self.folders.get(folder)
+            if known and known[0] == mtime:
+                stack.extend(known[1])
+                continue
+            try:
+                subdirs, files = list_dir(folder, self.extensions, self.skip)
+            except OSError:
+                continue
+            found.extend(files if known is None else set(files).difference(known[2]))
+            # A folder changed within the last couple of seconds is listed again next
+            # time: coarse mtimes (FAT, SMB) can hide a second change in the same tick
+            stable = time.time_ns() - mtime > 2e9
+            self.folders[folder] = (mtime if stable else None, subdirs, files)
+            stack.extend(subdirs)
+        for folder in self.folders.keys() - seen:
+            del self.folders[folder]
+        return found
+
+    def close(self):
+        pass
+
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, name length
+
+
+def inotify_available():
+    return sys.platform.startswith("linux") and ctypes.util.find_library("c") is not None
+
+
+class InotifySource:
+    name = "inotify"
+    MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+    def __init__(self, root, extensions, skip=()):
+        self.root = root
+        self.extensions = extensions
+        self.skip = skip
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0: raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.folders = {}  # watch descriptor -> folder
+
+    def _watch_tree(self, root):
+        # Watch first, list second: a file landing in between is seen either way
+        found = []
+        stack = [root]
+        while stack:
+            folder = stack.pop()
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(folder), self.MASK)
+            if wd < 0: continue  # vanished, or out of watches (fs.inotify.max_user_watches)
+            self.folders[wd] = folder
+            try:
+                subdirs, files = list_dir(folder, self.extensions, self.skip)
+            except OSError:
+                continue
+            found.extend(files)
+            stack.extend(subdirs)
+        return found
+
+    def snapshot(self):
+        return self._watch_tree(self.root)
+
+    def changes(self, timeout):
+        if not select.select([self.fd], [], [], timeout)[0]: return []
+        try:
+            data = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return []
+        found = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0")
+            offset += _EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped: list everything again and let the queue sort it out
+                found.extend(self._watch_tree(self.root))
+                continue
+            folder = self.folders.get(wd)
+            if folder is None or not name: continue
+            path = os.path.join(folder, os.fsdecode(name))
+            if os.fsdecode(name).startswith('.'): continue
+            if mask & IN_ISDIR:
+                if path not in self.skip: found.extend(self._watch_tree(path))
+            elif os.path.splitext(path)[1].lower() in self.extensions:
+                found.append(path)
+        return found
+
+    def close(self):
+        os.close(self.fd)
+
+
+# --- Settling ---
+
+class Settler:
+    def __init__(self, settle=SETTLE_SECONDS):
+        self.settle = settle
+        self.pending = {}  # path -> ((size, mtime_ns), unchanged since)
+        self.next_check = 0.0
+
+    def add(self, path):
+        self.pending.setdefault(path, (None, 0.0))
+
+    def ready(self):
+        # -> [(path, (size, mtime_ns))] for files that have stopped changing
+        now = time.monotonic()
+        if not self.pending or now < self.next_check: return []
+        self.next_check = now + min(self.settle / 4, 0.5)
+        settled = []
+        for path, (signature, since) in list(self.pending.items()):
+            try:
+                st = os.stat(path)
+            except OSError:
+                del self.pending[path]  # deleted or moved away before it settled
+                continue
+            current = (st.st_size, st.st_mtime_ns)
+            if current != signature:
+                self.pending[path] = (current, now)
+            elif now - since >= self.settle:
+                settled.append((path, current))
+                del self.pending[path]
+        return settled
+
+
+# --- Persistent Queue ---
+
+class WatchQueue:
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # Survives the watcher being killed; only a power cut can lose the last few updates
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, "
+            "state TEXT NOT NULL, updated REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS files_state ON files (state, updated)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS names (name TEXT PRIMARY KEY, path TEXT UNIQUE NOT NULL, stem TEXT NOT NULL)")
+        # Running when the last session stopped, or failed: convert again (like a resumed batch)
+        self._db.execute("UPDATE files SET state = 'queued' WHERE state IN ('running', 'error')")
+
+    def seen(self, path, signature):
+        row = self._db.execute("SELECT size, mtime_ns FROM files WHERE path = ?", (path,)).fetchone()
+        return row is not None and tuple(row) == signature
+
+    def offer(self, path, signature):
+        # Queue a settled file unless this exact version was already seen
+        if self.seen(path, signature): return False
+        self._db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, 'queued', ?)", (path, *signature, time.time()))
+        return True
+
+    def mark_output(self, path, signature):
+        # One of our own outputs: seen, never converted (unless it is rewritten later)
+        self._db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, 'output', ?)", (path, *signature, time.time()))
+
+    def take(self, limit):
+        rows = self._db.execute(
+            "SELECT path FROM files WHERE state = 'queued' ORDER BY updated LIMIT ?", (limit,)
+        ).fetchall()
+        paths = [row[0] for row in rows]
+        self._db.executemany("UPDATE files SET state = 'running' WHERE path = ?", [(path,) for path in paths])
+        return paths
+
+    def finish(self, path, state):
+        # A file rewritten while it was converting has been queued again; leave it queued
+        self._db.execute("UPDATE files SET state = ?, updated = ? WHERE path = ? AND state = 'running'", (state, time.time(), path))
+
+    def output_stem(self, path, taken=None):
+        # -> the name path's outputs go under, claimed on first use; taken(stem) can
+        # rule out names that are not in the table
+        row = self._db.execute("SELECT stem FROM names WHERE path = ?", (path,)).fetchone()
+        if row is not None: return row[0]
+        stem = candidate = Path(path).stem
+        number = 1
+        # Case-insensitive, like the default macOS volume
+        while (self._db.execute("SELECT 1 FROM names WHERE name = ?", (candidate.lower(),)).fetchone()
+               or (taken is not None and taken(candidate))):
+            number += 1
+            candidate = numbered_stem(stem, number)
+        self._db.execute("INSERT INTO names VALUES (?, ?, ?)", (candidate.lower(), path, candidate))
+        return candidate
+
+    def count(self, state):
+        return self._db.execute("SELECT COUNT(*) FROM files WHERE state = ?", (state,)).fetchone()[0]
+
+    def close(self):
+        self._db.close()
+
+
+def state_path(root, job, state_dir=None):
+    # One queue per watched folder and settings
+    key = json.dumps([os.path.abspath(root), *job], sort_keys=True)
+    name = hashlib.blake2b(key.encode(), digest_size=10).hexdigest()
+    return os.path.join(state_dir or default_state_dir(), f"{name}.sqlite3")
+
+
+# --- Watcher ---
+
+class FolderWatcher:
+    def __init__(self, root, job, engine, state_dir=None, settle=None, poll_interval=None):
+        # job: (mode, fmt, out_dir, options), applied to every file that lands in root
+        self.root = os.path.abspath(root)
+        self.job = tuple(job)
+        self.engine = engine
+        self.queue = WatchQueue(state_path(self.root, self.job, state_dir))
+        self.settler = Settler(SETTLE_SECONDS if settle is None else settle)
+
+        out_dir = os.path.abspath(job[2])
+        skip = {out_dir} if out_dir.startswith(self.root + os.sep) else set()
+        # Outputs land next to the sources: a name that is already there (like a.png
+        # itself, converting to PNG) gets a numbered one instead of being written over
+        self.in_place = out_dir == self.root
+        if poll_interval is None and inotify_available():
+            self.source = InotifySource(self.root, SUPPORTED_EXTENSIONS, skip)
+        else:
+            self.source = PollSource(self.root, SUPPORTED_EXTENSIONS, skip, poll_interval or POLL_INTERVAL)
+
+    def run(self, stop, on_result, on_progress=None):
+        # Until stop (a threading.Event) is set; then finishes the jobs in flight.
+        # Queued files stay in the queue for the next session.
+        remove_partials(self.job[2])
+        self.engine.warm_up(warm_worker)
+        capacity = self.engine.workers * JOBS_PER_WORKER + self.engine.media_workers
+        in_flight = {}
+
+        for path in self.source.snapshot():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if not self.queue.seen(path, (st.st_size, st.st_mtime_ns)): self.settler.add(path)
+
+        try:
+            while not stop.is_set() or in_flight:
+                if not stop.is_set():
+                    # While jobs run, wake up for whichever comes first (below), not the tick
+                    for path in self.source.changes(0 if in_flight else TICK):
+                        self.settler.add(path)
+                    for path, signature in self.settler.ready():
+                        self.queue.offer(path, signature)
+                    free = capacity - len(in_flight)
+                    if free > 0:
+                        jobs = [self._job(path) for path in self.queue.take(free)]
+                        for job in scheduler.plan(jobs, is_image_job, self.engine.workers, self.engine.media_workers):
+                            in_flight[self.engine.submit(convert_file, job, is_image_job, on_progress)] = job
+                if in_flight:
+                    wait(in_flight, timeout=TICK, return_when=FIRST_COMPLETED)
+                for future in [f for f in in_flight if f.done()]:
+                    job = in_flight.pop(future)
+                    try:
+                        result, error = future.result(), None
+                    except Exception as e:
+                        result, error = None, e
+                    if error is None: self._mark_outputs(result["outputs"])
+                    self.queue.finish(job[0], "error" if error is not None else result["status"])
+                    on_result(job, result, error)
+        finally:
+            self.source.close()
+            self.queue.close()
+
+    def _job(self, path):
+        mode, fmt, out_dir, options = self.job
+        stem = self.queue.output_stem(path, self._exists if self.in_place else None)
+        if stem != Path(path).stem: options = {**(options or {}), 'stem': stem}
+        return (path, mode, fmt, out_dir, options)
+
+    def _exists(self, stem):
+        _, fmt, out_dir, _ = self.job
+        return any(os.path.exists(os.path.join(out_dir, f"{stem}.{f}")) for f in (fmt if isinstance(fmt, tuple) else (fmt,)))
+
+    def _mark_outputs(self, outputs):
+        for path in outputs:
+            path = os.path.abspath(path)
+            if not path.startswith(self.root + os.sep): continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            self.queue.mark_output(path, (st.st_size, st.st_mtime_ns))